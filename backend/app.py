@@ -5,65 +5,44 @@ Author: AI Assistant
 Date: 2025
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 import heapq
 import math
 from collections import deque
 import json
 import os
+import time
 from datetime import datetime
 
+from graph import Graph
+from search_context import SEARCH_POOL, GCMonitor
+from heuristics import HEURISTICS, TableHeuristic, resolve_heuristic
+from hierarchy import ON_DEMAND_MAX_NODES, HPASearch, hierarchy_for
+from bounded import BeamSearch, SMAStarSearch, memory_limits_from_request
+from vector_bfs import HAS_NUMPY, VectorBFSSearch
+from tiles import parse_bbox, parse_zoom, tile_index_for
+from traffic import CacheWarmer, TrafficRecorder
+from constraints import constraints_from_request
+from dispatch import assign_parcels, nearest_courier
+from limits import ActiveSearches, SearchBudget, budget_from_request, limits_from_env
+from profiling import (PhaseTimer, SlowQueryLog, capture_slow_queries, phase,
+                       profiling_requested, search_counters)
+from wire import (GRAPH_FORMATS, GRAPH_PAYLOADS, TRACE_FORMATS, cached_response,
+                  columnar_trace)
+
 # ==================== FLASK SETUP ====================
 app = Flask(__name__)
 CORS(app, resources={
     r"/api/*": {
         "origins": "*",
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type", "If-None-Match", "X-Profile"],
+        "expose_headers": ["ETag"]
     }
 })
 
 # ==================== GRAPH DATA ====================
-class Graph:
-    """Graph representation with nodes and edges"""
-    
-    def __init__(self):
-        self.nodes = {}
-        self.edges = {}
-        self.coordinates = {}
-        self.heuristics = {}
-        
-    def add_node(self, node_id, x, y, h_value):
-        """Add node with coordinates and heuristic value"""
-        self.nodes[node_id] = {'x': x, 'y': y}
-        self.coordinates[node_id] = (x, y)
-        self.heuristics[node_id] = h_value
-        self.edges[node_id] = {}
-        
-    def add_edge(self, from_node, to_node, cost):
-        """Add bidirectional edge"""
-        if from_node not in self.edges:
-            self.edges[from_node] = {}
-        if to_node not in self.edges:
-            self.edges[to_node] = {}
-            
-        self.edges[from_node][to_node] = cost
-        self.edges[to_node][from_node] = cost
-        
-    def get_neighbors(self, node_id):
-        """Get neighbors and costs"""
-        return self.edges.get(node_id, {})
-    
-    def get_heuristic(self, node_id):
-        """Get heuristic value for node"""
-        return self.heuristics.get(node_id, 0)
-    
-    def get_coordinate(self, node_id):
-        """Get node coordinates"""
-        return self.coordinates.get(node_id, (0, 0))
-
-
 def load_graph():
     """Load graph from data file"""
     graph = Graph()
@@ -106,65 +85,97 @@ def load_graph():
 # Load graph on startup
 GRAPH = load_graph()
 
+# Server-wide search limits that requests may tighten but not exceed
+SEARCH_LIMITS = limits_from_env(os.environ)
+
+# Running searches that clients named with `search_id`, for /api/search/cancel
+ACTIVE_SEARCHES = ActiveSearches()
+
+# Slow-query log, enabled by setting SLOW_QUERY_MS
+SLOW_QUERIES = SlowQueryLog.from_env(os.environ)
+
+# Saved HPA* hierarchy (see build_hierarchy.py), paged in a cell at a time
+HIERARCHY_DIR = os.environ.get('HPA_HIERARCHY_DIR')
+
+# Request log for replay, enabled by setting TRAFFIC_LOG
+TRAFFIC = TrafficRecorder.from_env(os.environ)
+
+# Logged requests replayed before serving, enabled by setting TRAFFIC_WARM
+WARMER = CacheWarmer.from_env(os.environ)
+
 # ==================== ALGORITHM: A* SEARCH ====================
 class AStarSearch:
     """A* Search Algorithm Implementation"""
     
-    def __init__(self, graph, start, goal):
+    def __init__(self, graph, start, goal, context=None, heuristic=None, timer=None,
+                 budget=None):
         self.graph = graph
         self.start = start
         self.goal = goal
+        self.context = context
+        self.heuristic = heuristic or TableHeuristic(graph)
+        self.timer = timer
+        self.budget = budget
         self.open_list = []
-        self.closed_list = set()
         self.trace = []
-        self.parent_map = {start: None}
-        self.g_values = {start: 0}
         self.nodes_expanded = 0
         
-    def calculate_f(self, node):
-        """Calculate f(n) = g(n) + h(n)"""
-        g = self.g_values.get(node, float('inf'))
-        h = self.graph.get_heuristic(node)
-        return g + h
-    
     def search(self):
         """Execute A* search"""
+        if self.context is not None:
+            # A supplied context may be fresh or left over from another query
+            self.context.reset(len(self.graph.node_ids))
+            return self._search(self.context)
+        with SEARCH_POOL.lease(self.graph) as context:
+            return self._search(context)
+    
+    def _search(self, context):
+        """A* main loop over a leased search context"""
+        graph = self.graph
+        node_index = graph.node_index
+        node_ids = graph.node_ids
+        open_list = self.open_list
+        generation = context.generation
+        g_values = context.g
+        parent = context.parent
+        seen = context.seen
+        closed = context.closed
+        heuristic_batch = self.heuristic.batch
+        budget = self.budget
+        
         # Initialize start node
-        start_h = self.graph.get_heuristic(self.start)
-        start_f = self.calculate_f(self.start)
+        start = node_index[self.start]
+        goal = node_index[self.goal]
+        start_h = self.heuristic(self.start)
+        context.visit(start, 0, -1)
         
-        heapq.heappush(self.open_list, (start_f, id(self), {
-            'node': self.start,
-            'g': 0,
-            'h': start_h,
-            'f': start_f
-        }))
+        # Entries are (f, tie-breaker, node index, g, h)
+        counter = 0
+        heapq.heappush(open_list, (start_h, counter, start, 0, start_h))
         
         step = 0
         
-        while self.open_list:
-            f_value, _, node_data = heapq.heappop(self.open_list)
-            current_node = node_data['node']
-            current_g = node_data['g']
+        while open_list:
+            f_value, _, current, current_g, current_h = heapq.heappop(open_list)
             
-            if current_node in self.closed_list:
+            if closed[current] == generation:
                 continue
             
             # Record trace
             self.trace.append({
                 'step': step,
-                'node': current_node,
+                'node': node_ids[current],
                 'g': round(current_g, 2),
-                'h': round(node_data['h'], 2),
-                'f': round(node_data['f'], 2),
-                'open_size': len(self.open_list),
-                'closed_size': len(self.closed_list)
+                'h': round(current_h, 2),
+                'f': round(f_value, 2),
+                'open_size': len(open_list),
+                'closed_size': self.nodes_expanded
             })
             step += 1
             
             # Goal check
-            if current_node == self.goal:
-                path = self._reconstruct_path()
+            if current == goal:
+                path = self._reconstruct_path(context, goal)
                 return {
                     'path': path,
                     'cost': round(current_g, 2),
@@ -173,29 +184,34 @@ class AStarSearch:
                     'success': True
                 }
             
-            self.closed_list.add(current_node)
+            if budget is not None and budget.exhausted(self.nodes_expanded):
+                return budget.limit_result(self.nodes_expanded, self.trace)
+            
+            closed[current] = generation
             self.nodes_expanded += 1
             
             # Explore neighbors
-            for neighbor, cost in self.graph.get_neighbors(current_node).items():
-                if neighbor in self.closed_list:
+            candidates = []
+            for neighbor, cost in graph.get_neighbors(node_ids[current]).items():
+                neighbor_index = node_index[neighbor]
+                if closed[neighbor_index] == generation:
                     continue
                 
                 new_g = current_g + cost
                 
                 # Check if this is a better path
-                if neighbor not in self.g_values or new_g < self.g_values[neighbor]:
-                    self.g_values[neighbor] = new_g
-                    h_value = self.graph.get_heuristic(neighbor)
-                    f_value = new_g + h_value
-                    
-                    self.parent_map[neighbor] = current_node
-                    heapq.heappush(self.open_list, (f_value, id(self), {
-                        'node': neighbor,
-                        'g': new_g,
-                        'h': h_value,
-                        'f': f_value
-                    }))
+                if seen[neighbor_index] != generation or new_g < g_values[neighbor_index]:
+                    g_values[neighbor_index] = new_g
+                    parent[neighbor_index] = current
+                    seen[neighbor_index] = generation
+                    candidates.append(neighbor_index)
+            
+            # Evaluate h(n) for all improved neighbors in one batch
+            if candidates:
+                for neighbor_index, h_value in zip(candidates, heuristic_batch(candidates)):
+                    new_g = g_values[neighbor_index]
+                    counter += 1
+                    heapq.heappush(open_list, (new_g + h_value, counter, neighbor_index, new_g, h_value))
         
         return {
             'path': None,
@@ -206,52 +222,73 @@ class AStarSearch:
             'error': 'No path found'
         }
     
-    def _reconstruct_path(self):
+    def _reconstruct_path(self, context, goal):
         """Reconstruct path from goal to start"""
-        path = []
-        current = self.goal
-        while current is not None:
-            path.insert(0, current)
-            current = self.parent_map.get(current)
-        return path
+        with phase(self.timer, 'reconstruction'):
+            return context.reconstruct_path(self.graph.node_ids, goal)
 
 
 # ==================== ALGORITHM: BREADTH-FIRST SEARCH ====================
 class BFSSearch:
     """Breadth-First Search Algorithm Implementation"""
     
-    def __init__(self, graph, start, goal):
+    def __init__(self, graph, start, goal, context=None, timer=None, budget=None):
         self.graph = graph
         self.start = start
         self.goal = goal
-        self.queue = deque([start])
-        self.visited = {start}
-        self.parent_map = {start: None}
-        self.cost_map = {start: 0}
+        self.context = context
+        self.timer = timer
+        self.budget = budget
+        self.queue = deque()
         self.trace = []
         self.nodes_expanded = 0
         
     def search(self):
         """Execute BFS"""
+        if self.context is not None:
+            # A supplied context may be fresh or left over from another query
+            self.context.reset(len(self.graph.node_ids))
+            return self._search(self.context)
+        with SEARCH_POOL.lease(self.graph) as context:
+            return self._search(context)
+    
+    def _search(self, context):
+        """BFS main loop over a leased search context"""
+        graph = self.graph
+        node_index = graph.node_index
+        node_ids = graph.node_ids
+        queue = self.queue
+        generation = context.generation
+        cost_map = context.g
+        parent = context.parent
+        visited = context.seen
+        budget = self.budget
+        
+        start = node_index[self.start]
+        goal = node_index[self.goal]
+        context.visit(start, 0, -1)
+        queue.append(start)
+        visited_size = 1
+        
         step = 0
         
-        while self.queue:
-            current_node = self.queue.popleft()
-            current_cost = self.cost_map[current_node]
+        while queue:
+            current = queue.popleft()
+            current_cost = cost_map[current]
             
             # Record trace
             self.trace.append({
                 'step': step,
-                'node': current_node,
+                'node': node_ids[current],
                 'cost': round(current_cost, 2),
-                'queue_size': len(self.queue),
-                'visited_size': len(self.visited)
+                'queue_size': len(queue),
+                'visited_size': visited_size
             })
             step += 1
             
             # Goal check
-            if current_node == self.goal:
-                path = self._reconstruct_path()
+            if current == goal:
+                path = self._reconstruct_path(context, goal)
                 return {
                     'path': path,
                     'cost': round(current_cost, 2),
@@ -260,15 +297,20 @@ class BFSSearch:
                     'success': True
                 }
             
+            if budget is not None and budget.exhausted(self.nodes_expanded):
+                return budget.limit_result(self.nodes_expanded, self.trace)
+            
             self.nodes_expanded += 1
             
             # Explore neighbors
-            for neighbor, edge_cost in self.graph.get_neighbors(current_node).items():
-                if neighbor not in self.visited:
-                    self.visited.add(neighbor)
-                    self.parent_map[neighbor] = current_node
-                    self.cost_map[neighbor] = current_cost + edge_cost
-                    self.queue.append(neighbor)
+            for neighbor, edge_cost in graph.get_neighbors(node_ids[current]).items():
+                neighbor_index = node_index[neighbor]
+                if visited[neighbor_index] != generation:
+                    visited[neighbor_index] = generation
+                    visited_size += 1
+                    parent[neighbor_index] = current
+                    cost_map[neighbor_index] = current_cost + edge_cost
+                    queue.append(neighbor_index)
         
         return {
             'path': None,
@@ -279,40 +321,53 @@ class BFSSearch:
             'error': 'No path found'
         }
     
-    def _reconstruct_path(self):
+    def _reconstruct_path(self, context, goal):
         """Reconstruct path from goal to start"""
-        path = []
-        current = self.goal
-        while current is not None:
-            path.insert(0, current)
-            current = self.parent_map.get(current)
-        return path
+        with phase(self.timer, 'reconstruction'):
+            return context.reconstruct_path(self.graph.node_ids, goal)
 
 
 # ==================== ALGORITHM: DEPTH-FIRST SEARCH ====================
 class DFSSearch:
     """Depth-First Search Algorithm Implementation"""
     
-    def __init__(self, graph, start, goal):
+    def __init__(self, graph, start, goal, context=None, timer=None, budget=None):
         self.graph = graph
         self.start = start
         self.goal = goal
-        self.visited = set()
-        self.parent_map = {start: None}
-        self.cost_map = {start: 0}
+        self.context = context
+        self.timer = timer
+        self.budget = budget
+        self.visited_size = 0
         self.trace = []
         self.nodes_expanded = 0
         self.step = 0
+        self.limit_reached = False
         
     def search(self):
         """Execute DFS"""
-        found = self._dfs_recursive(self.start)
+        if self.context is not None:
+            # A supplied context may be fresh or left over from another query
+            self.context.reset(len(self.graph.node_ids))
+            return self._search(self.context)
+        with SEARCH_POOL.lease(self.graph) as context:
+            return self._search(context)
+    
+    def _search(self, context):
+        """Run DFS over a leased search context"""
+        start = self.graph.node_index[self.start]
+        goal = self.graph.node_index[self.goal]
+        context.visit(start, 0, -1)
+        found = self._dfs(context, start, goal)
+        
+        if self.limit_reached:
+            return self.budget.limit_result(self.nodes_expanded, self.trace)
         
         if found:
-            path = self._reconstruct_path()
+            path = self._reconstruct_path(context, goal)
             return {
                 'path': path,
-                'cost': round(self.cost_map[self.goal], 2),
+                'cost': round(context.g[goal], 2),
                 'nodes_expanded': self.nodes_expanded,
                 'trace': self.trace,
                 'success': True
@@ -327,44 +382,83 @@ class DFSSearch:
                 'error': 'No path found'
             }
     
-    def _dfs_recursive(self, node):
-        """Recursive DFS helper"""
-        self.visited.add(node)
-        current_cost = self.cost_map[node]
-        
-        # Record trace
-        self.trace.append({
-            'step': self.step,
-            'node': node,
-            'cost': round(current_cost, 2),
-            'visited_size': len(self.visited)
-        })
-        self.step += 1
-        
-        # Goal check
-        if node == self.goal:
-            return True
-        
-        self.nodes_expanded += 1
-        
-        # Explore neighbors
-        for neighbor, edge_cost in self.graph.get_neighbors(node).items():
-            if neighbor not in self.visited:
-                self.parent_map[neighbor] = node
-                self.cost_map[neighbor] = current_cost + edge_cost
-                if self._dfs_recursive(neighbor):
-                    return True
+    def _dfs(self, context, start, goal):
+        """Iterative DFS helper, visiting nodes in recursive order"""
+        graph = self.graph
+        node_index = graph.node_index
+        # Nodes on the current path with their unexplored neighbors, so deep
+        # graphs cannot exhaust the interpreter's recursion limit
+        stack = []
+        node = start
+        
+        while node is not None:
+            context.close(node)
+            self.visited_size += 1
+            current_cost = context.g[node]
+            
+            # Record trace
+            self.trace.append({
+                'step': self.step,
+                'node': graph.node_ids[node],
+                'cost': round(current_cost, 2),
+                'visited_size': self.visited_size
+            })
+            self.step += 1
+            
+            # Goal check
+            if node == goal:
+                return True
+            
+            if self.budget is not None and self.budget.exhausted(self.nodes_expanded):
+                self.limit_reached = True
+                return False
+            
+            self.nodes_expanded += 1
+            stack.append((node, iter(graph.get_neighbors(graph.node_ids[node]).items())))
+            
+            # Descend into the next unclosed neighbor, backtracking when none are left
+            node = None
+            while stack and node is None:
+                parent, neighbors = stack[-1]
+                for neighbor, edge_cost in neighbors:
+                    neighbor_index = node_index[neighbor]
+                    if not context.is_closed(neighbor_index):
+                        context.visit(neighbor_index, context.g[parent] + edge_cost, parent)
+                        node = neighbor_index
+                        break
+                else:
+                    stack.pop()
         
         return False
     
-    def _reconstruct_path(self):
+    def _reconstruct_path(self, context, goal):
         """Reconstruct path from goal to start"""
-        path = []
-        current = self.goal
-        while current is not None:
-            path.insert(0, current)
-            current = self.parent_map.get(current)
-        return path
+        with phase(self.timer, 'reconstruction'):
+            return context.reconstruct_path(self.graph.node_ids, goal)
+
+
+# ==================== ALGORITHM REGISTRY ====================
+ALGORITHMS = {
+    'astar': AStarSearch,
+    'bfs': BFSSearch,
+    'dfs': DFSSearch,
+    'hpa': HPASearch,
+    'beam': BeamSearch,
+    'sma': SMAStarSearch
+}
+
+# The vectorized BFS needs NumPy
+if HAS_NUMPY:
+    ALGORITHMS['bfs_vector'] = VectorBFSSearch
+
+# Engines that accept a `heuristic` provider
+INFORMED_ALGORITHMS = {'astar', 'hpa', 'beam', 'sma'}
+
+# Engines that accept `max_nodes` / `max_memory_bytes`
+BOUNDED_ALGORITHMS = {'beam', 'sma'}
+
+# Engines that search precomputed structures and cannot take constraints
+PRECOMPUTED_ALGORITHMS = {'hpa', 'bfs_vector'}
 
 
 # ==================== API ROUTES ====================
@@ -373,35 +467,39 @@ class DFSSearch:
 def get_graph():
     """Get graph data"""
     try:
-        nodes = {}
-        edges = []
-        
-        # Convert nodes
-        for node_id, data in GRAPH.nodes.items():
-            nodes[node_id] = {
-                'x': data['x'],
-                'y': data['y'],
-                'h': GRAPH.get_heuristic(node_id)
-            }
-        
-        # Convert edges
-        added = set()
-        for from_node, neighbors in GRAPH.edges.items():
-            for to_node, cost in neighbors.items():
-                key = tuple(sorted([from_node, to_node]))
-                if key not in added:
-                    edges.append({
-                        'from': from_node,
-                        'to': to_node,
-                        'cost': cost
-                    })
-                    added.add(key)
+        fmt = request.args.get('format', 'json')
+        if fmt not in GRAPH_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': 'Unknown format'
+            }), 400
         
-        return jsonify({
-            'success': True,
-            'nodes': nodes,
-            'edges': edges
-        }), 200
+        # Encoded once per graph version; clients revalidate with If-None-Match
+        return cached_response(request, GRAPH_PAYLOADS.get(GRAPH, fmt))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/graph/tiles', methods=['GET'])
+def get_graph_tiles():
+    """Get the nodes and edges of the tiles covering a viewport"""
+    try:
+        index = tile_index_for(GRAPH)
+        try:
+            bbox = parse_bbox(request.args['bbox']) if 'bbox' in request.args else index.bounds
+            zoom = parse_zoom(request.args.get('zoom', 0))
+            etag = index.etag(bbox, zoom)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify(index.query(bbox, zoom))
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -410,41 +508,144 @@ def get_graph():
 @app.route('/api/search', methods=['POST'])
 def search():
     """Execute search algorithm"""
+    profile = profiling_requested(request)
+    timer = PhaseTimer() if profile or SLOW_QUERIES is not None else None
     try:
-        data = request.json
-        start = data.get('start', 'A')
-        goal = data.get('goal', 'G')
-        algorithm = data.get('algorithm', 'astar')
-        
-        # Validate nodes
-        if start not in GRAPH.nodes or goal not in GRAPH.nodes:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid start or goal node'
-            }), 400
-        
-        # Execute algorithm
-        if algorithm == 'astar':
-            searcher = AStarSearch(GRAPH, start, goal)
-        elif algorithm == 'bfs':
-            searcher = BFSSearch(GRAPH, start, goal)
-        elif algorithm == 'dfs':
-            searcher = DFSSearch(GRAPH, start, goal)
-        else:
+        with capture_slow_queries(SLOW_QUERIES) as capture:
+            capture.timer = timer
+            with phase(timer, 'validation'):
+                data = request.json
+                capture.params = data
+                start = data.get('start', 'A')
+                goal = data.get('goal', 'G')
+                algorithm = data.get('algorithm', 'astar')
+                heuristic = data.get('heuristic', 'auto')
+                trace_format = data.get('trace_format', 'rows')
+                
+                # Validate nodes
+                if start not in GRAPH.nodes or goal not in GRAPH.nodes:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Invalid start or goal node'
+                    }), 400
+                
+                # Execute algorithm
+                if algorithm not in ALGORITHMS:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Unknown algorithm'
+                    }), 400
+                
+                if heuristic not in HEURISTICS:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Unknown heuristic'
+                    }), 400
+                
+                if trace_format not in TRACE_FORMATS:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Unknown trace format'
+                    }), 400
+                
+                search_id = data.get('search_id')
+                if search_id is not None and not isinstance(search_id, str):
+                    return jsonify({
+                        'success': False,
+                        'error': 'search_id must be a string'
+                    }), 400
+                
+                try:
+                    budget = budget_from_request(data, SEARCH_LIMITS)
+                    memory_limits = memory_limits_from_request(data)
+                    graph = constraints_from_request(GRAPH, data)
+                except ValueError as e:
+                    return jsonify({'success': False, 'error': str(e)}), 400
+                
+                if graph is None:
+                    graph = GRAPH
+                elif algorithm in PRECOMPUTED_ALGORITHMS:
+                    return jsonify({
+                        'success': False,
+                        'error': f'{algorithm} does not support route constraints'
+                    }), 400
+                elif start in graph.avoid_nodes or goal in graph.avoid_nodes:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Start and goal cannot be avoided'
+                    }), 400
+            
+            with phase(timer, 'search'):
+                options = {}
+                if algorithm == 'hpa':
+                    try:
+                        options['hierarchy'] = hierarchy_for(GRAPH, HIERARCHY_DIR,
+                                                             ON_DEMAND_MAX_NODES)
+                    except ValueError as e:
+                        return jsonify({'success': False, 'error': str(e)}), 503
+                if algorithm in INFORMED_ALGORITHMS:
+                    options['heuristic'] = resolve_heuristic(GRAPH, goal, heuristic)
+                if algorithm in BOUNDED_ALGORITHMS:
+                    options.update(memory_limits)
+                    options['track_memory'] = bool(data.get('track_memory'))
+                
+                if search_id is not None and not ACTIVE_SEARCHES.register(search_id, budget):
+                    return jsonify({
+                        'success': False,
+                        'error': 'A search with this search_id is already running'
+                    }), 400
+                try:
+                    searcher = ALGORITHMS[algorithm](graph, start, goal, timer=timer,
+                                                     budget=budget, **options)
+                    result = searcher.search()
+                finally:
+                    if search_id is not None:
+                        ACTIVE_SEARCHES.release(search_id)
+            capture.counters = search_counters(result)
+            
+            if trace_format == 'columnar':
+                result['trace'] = columnar_trace(result['trace'])
+            
+            response = {
+                'success': True,
+                'algorithm': algorithm,
+                'start': start,
+                'goal': goal,
+                **({'heuristic': options['heuristic'].name} if 'heuristic' in options else {}),
+                **result
+            }
+            
+            if profile:
+                # Time the encoding that is sent, then splice the breakdown
+                # into the encoded object so the result is not encoded twice
+                with phase(timer, 'serialization'):
+                    body = app.json.dumps(response)
+                breakdown = app.json.dumps({
+                    'phases': timer.as_dict(),
+                    'counters': capture.counters
+                })
+                return app.response_class(f'{body[:-1]}, "profile": {breakdown}}}\n',
+                                          status=200, mimetype=app.json.mimetype)
+            
+            return jsonify(response), 200
+    
+    except Exception as e:
+        app.logger.exception('Search failed')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/search/cancel', methods=['POST'])
+def cancel_search():
+    """Stop a running search started with the same search_id"""
+    try:
+        search_id = request.json.get('search_id')
+        if not isinstance(search_id, str) or not ACTIVE_SEARCHES.cancel(search_id):
             return jsonify({
                 'success': False,
-                'error': 'Unknown algorithm'
-            }), 400
+                'error': 'No running search with this search_id'
+            }), 404
         
-        result = searcher.search()
-        
-        return jsonify({
-            'success': True,
-            'algorithm': algorithm,
-            'start': start,
-            'goal': goal,
-            **result
-        }), 200
+        return jsonify({'success': True, 'search_id': search_id}), 200
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -457,6 +658,7 @@ def compare():
         data = request.json
         start = data.get('start', 'A')
         goal = data.get('goal', 'G')
+        heuristic = data.get('heuristic', 'auto')
         
         # Validate nodes
         if start not in GRAPH.nodes or goal not in GRAPH.nodes:
@@ -465,18 +667,32 @@ def compare():
                 'error': 'Invalid start or goal node'
             }), 400
         
+        if heuristic not in HEURISTICS:
+            return jsonify({
+                'success': False,
+                'error': 'Unknown heuristic'
+            }), 400
+        
+        # One budget for the whole request; the deadline covers all three runs
+        try:
+            budget = budget_from_request(data, SEARCH_LIMITS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         results = {}
         
         # Run A*
-        astar_searcher = AStarSearch(GRAPH, start, goal)
+        astar_searcher = AStarSearch(GRAPH, start, goal,
+                                     heuristic=resolve_heuristic(GRAPH, goal, heuristic),
+                                     budget=budget)
         results['astar'] = astar_searcher.search()
         
         # Run BFS
-        bfs_searcher = BFSSearch(GRAPH, start, goal)
+        bfs_searcher = BFSSearch(GRAPH, start, goal, budget=budget)
         results['bfs'] = bfs_searcher.search()
         
         # Run DFS
-        dfs_searcher = DFSSearch(GRAPH, start, goal)
+        dfs_searcher = DFSSearch(GRAPH, start, goal, budget=budget)
         results['dfs'] = dfs_searcher.search()
         
         # Calculate metrics
@@ -508,6 +724,58 @@ def compare():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/dispatch', methods=['POST'])
+def dispatch():
+    """Find the nearest courier for a parcel, or assign many parcels"""
+    try:
+        data = request.json
+        batch = 'parcels' in data
+        try:
+            couriers = parse_locations(data.get('couriers'), 'couriers')
+            parcels = parse_locations(data.get('parcels') if batch else [data.get('parcel')],
+                                      'parcels' if batch else 'parcel')
+            budget = budget_from_request(data, SEARCH_LIMITS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        capacity = data.get('capacity')
+        
+        # Validate locations
+        if not couriers or not parcels:
+            return jsonify({
+                'success': False,
+                'error': 'At least one courier and one parcel are required'
+            }), 400
+        
+        if any(node not in GRAPH.nodes for _, node in couriers + parcels):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid courier or parcel node'
+            }), 400
+        
+        if data.get('heuristic', 'auto') not in HEURISTICS:
+            return jsonify({
+                'success': False,
+                'error': 'Unknown heuristic'
+            }), 400
+        
+        if capacity is not None and (not isinstance(capacity, int) or capacity < 1):
+            return jsonify({
+                'success': False,
+                'error': 'Capacity must be a positive integer'
+            }), 400
+        
+        if batch:
+            result = assign_parcels(GRAPH, parcels, couriers, capacity, budget)
+        else:
+            result = nearest_courier(GRAPH, parcels[0][1], couriers,
+                                     data.get('heuristic', 'auto'), budget)
+        
+        return jsonify(result), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/benchmark', methods=['GET'])
 def benchmark():
     """Run comprehensive benchmark"""
@@ -515,25 +783,30 @@ def benchmark():
         nodes = list(GRAPH.nodes.keys())
         benchmark_results = []
         
-        # Run comparisons for all node pairs
-        for start in nodes[:4]:  # Limit to first 4 nodes for demo
-            for goal in nodes:
-                if start != goal:
-                    # Run all algorithms
-                    astar = AStarSearch(GRAPH, start, goal).search()
-                    bfs = BFSSearch(GRAPH, start, goal).search()
-                    dfs = DFSSearch(GRAPH, start, goal).search()
+        # Run comparisons for all node pairs, measuring GC pauses
+        with GCMonitor() as gc_monitor:
+            for start in nodes[:4]:  # Limit to first 4 nodes for demo
+                for goal in nodes:
+                    if start != goal:
+                        # Run all algorithms
+                        astar = AStarSearch(GRAPH, start, goal,
+                                            heuristic=resolve_heuristic(GRAPH, goal),
+                                            budget=SearchBudget(**SEARCH_LIMITS)).search()
+                        bfs = BFSSearch(GRAPH, start, goal,
+                                        budget=SearchBudget(**SEARCH_LIMITS)).search()
+                        dfs = DFSSearch(GRAPH, start, goal,
+                                        budget=SearchBudget(**SEARCH_LIMITS)).search()
                     
-                    benchmark_results.append({
-                        'start': start,
-                        'goal': goal,
-                        'astar_nodes': astar.get('nodes_expanded', 0),
-                        'bfs_nodes': bfs.get('nodes_expanded', 0),
-                        'dfs_nodes': dfs.get('nodes_expanded', 0),
-                        'astar_cost': astar.get('cost', float('inf')),
-                        'bfs_cost': bfs.get('cost', float('inf')),
-                        'dfs_cost': dfs.get('cost', float('inf'))
-                    })
+                        benchmark_results.append({
+                            'start': start,
+                            'goal': goal,
+                            'astar_nodes': astar.get('nodes_expanded', 0),
+                            'bfs_nodes': bfs.get('nodes_expanded', 0),
+                            'dfs_nodes': dfs.get('nodes_expanded', 0),
+                            'astar_cost': astar.get('cost', float('inf')),
+                            'bfs_cost': bfs.get('cost', float('inf')),
+                            'dfs_cost': dfs.get('cost', float('inf'))
+                        })
         
         # Calculate statistics
         avg_astar_nodes = sum(r['astar_nodes'] for r in benchmark_results) / len(benchmark_results)
@@ -548,7 +821,9 @@ def benchmark():
                 'average_bfs_nodes': round(avg_bfs_nodes, 2),
                 'average_dfs_nodes': round(avg_dfs_nodes, 2),
                 'total_comparisons': len(benchmark_results)
-            }
+            },
+            'gc': gc_monitor.stats(),
+            'context_pool': SEARCH_POOL.stats()
         }), 200
     
     except Exception as e:
@@ -598,7 +873,7 @@ def health():
     """Health check endpoint"""
     return jsonify({
         'success': True,
-        'status': 'healthy',
+        'status': 'warming' if WARMER is not None and WARMER.warming else 'healthy',
         'timestamp': datetime.now().isoformat(),
         'graph_nodes': len(GRAPH.nodes),
         'graph_edges': sum(len(neighbors) for neighbors in GRAPH.edges.values()) // 2
@@ -607,6 +882,27 @@ def health():
 
 # ==================== HELPER FUNCTIONS ====================
 
+def parse_locations(items, name):
+    """Normalise couriers/parcels given as node ids or {'id', 'node'} objects.
+
+    Raises ValueError unless `items` is a list of strings or such objects.
+    """
+    if items is None:
+        return []
+    if not isinstance(items, list):
+        raise ValueError(f"{name} must be a list")
+    locations = []
+    for item in items:
+        if isinstance(item, dict):
+            location = (item.get('id', item.get('node')), item.get('node'))
+        else:
+            location = (item, item)
+        if not all(isinstance(value, str) for value in location):
+            raise ValueError(f"{name} must be node ids or {{'id', 'node'}} objects")
+        locations.append(location)
+    return locations
+
+
 def calculate_efficiency(astar_nodes, bfs_nodes):
     """Calculate efficiency percentage"""
     if bfs_nodes == 0:
@@ -620,6 +916,30 @@ def calculate_time_saved(astar_nodes, bfs_nodes):
     return round((bfs_nodes - astar_nodes) * time_per_node, 2)
 
 
+# ==================== TRAFFIC RECORDING ====================
+
+def start_cache_warming():
+    """Replay the TRAFFIC_WARM log in the background of the serving process"""
+    if WARMER is not None:
+        WARMER.start(app)
+
+
+@app.before_request
+def start_traffic_timer():
+    """Time requests the traffic log will record"""
+    if TRAFFIC is not None and TRAFFIC.wants(request):
+        g.traffic_started = time.perf_counter()
+
+
+@app.after_request
+def record_traffic(response):
+    """Append timed requests to the traffic log"""
+    started = g.pop('traffic_started', None)
+    if started is not None:
+        TRAFFIC.record(request, response.status_code, (time.perf_counter() - started) * 1000)
+    return response
+
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
@@ -643,9 +963,14 @@ def internal_error(error):
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
+    # The reloader's watcher process never serves; only its child warms
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_cache_warming()
     app.run(
         host='0.0.0.0',
         port=5000,
         debug=True,
         use_reloader=True
     )
+else:
+    start_cache_warming()
@@ -0,0 +1,183 @@
+"""
+Smart Courier - Benchmark Runner
+Times every registered search engine on seeded synthetic graphs
+
+Usage:
+    python benchmark.py --kinds grid road --sizes 1000 10000 --queries 20
+    python benchmark.py --format csv --output bench.csv
+"""
+
+import argparse
+import csv
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from app import ALGORITHMS, INFORMED_ALGORITHMS
+from generators import GENERATORS, generate
+from heuristics import HEURISTICS, resolve_heuristic
+from profiling import percentile
+from search_context import GCMonitor
+
+
+def git_commit():
+    """Current commit hash, if the runner is inside a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def query_pairs(graph, count, seed):
+    """Deterministic start/goal pairs drawn from the graph's nodes"""
+    rng = random.Random(seed)
+    node_ids = list(graph.nodes)
+    return [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(count)]
+
+
+def run_query(engine, graph, start, goal, heuristic=None):
+    """Run one query; returns the result and its wall time in milliseconds"""
+    began = time.perf_counter()
+    options = {}
+    if heuristic is not None:
+        options['heuristic'] = resolve_heuristic(graph, goal, heuristic)
+    result = engine(graph, start, goal, **options).search()
+    return result, (time.perf_counter() - began) * 1000
+
+
+def run_engine(engine, graph, pairs, heuristic=None):
+    """Time one engine over all query pairs.
+
+    An untimed first query builds the per-graph data engines create lazily
+    (hierarchies, CSR arrays, heuristic scales, pooled contexts); its time is
+    reported as `warmup_ms` so one-off builds do not skew the percentiles.
+    """
+    timings = []
+    expanded = []
+    successes = 0
+    warmup_ms = None
+    if pairs:
+        _, warmup_ms = run_query(engine, graph, *pairs[0], heuristic=heuristic)
+
+    with GCMonitor() as gc_monitor:
+        for start, goal in pairs:
+            result, elapsed_ms = run_query(engine, graph, start, goal, heuristic)
+            timings.append(elapsed_ms)
+            expanded.append(result['nodes_expanded'])
+            successes += int(result['success'])
+
+    record = {
+        'queries': len(pairs),
+        'warmup_ms': round(warmup_ms, 3) if warmup_ms is not None else None,
+        'success_rate': round(successes / len(pairs), 4) if pairs else 0,
+        'mean_ms': None,
+        'median_ms': None,
+        'p95_ms': None,
+        'total_ms': round(sum(timings), 3),
+        'mean_nodes_expanded': None
+    }
+    if timings:
+        record.update({
+            'mean_ms': round(statistics.mean(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_nodes_expanded': round(statistics.mean(expanded), 2)
+        })
+    gc_stats = gc_monitor.stats()
+    record.update({
+        'gc_collections': gc_stats['collections'],
+        'gc_pause_ms': gc_stats['pause_ms'],
+        'gc_max_pause_ms': gc_stats['max_pause_ms']
+    })
+    return record
+
+
+def run_benchmark(kinds, sizes, algorithms, queries, seed, heuristic='auto'):
+    """Run the full benchmark matrix and return result records"""
+    results = []
+    for kind in kinds:
+        for size in sizes:
+            began = time.perf_counter()
+            graph = generate(kind, size, seed=seed)
+            build_s = round(time.perf_counter() - began, 3)
+            pairs = query_pairs(graph, queries, seed)
+            edge_count = sum(len(neighbors) for neighbors in graph.edges.values()) // 2
+
+            for name in algorithms:
+                record = {
+                    'kind': kind,
+                    'size': size,
+                    'nodes': len(graph.nodes),
+                    'edges': edge_count,
+                    'build_s': build_s,
+                    'algorithm': name
+                }
+                informed = name in INFORMED_ALGORITHMS
+                record['heuristic'] = heuristic if informed else None
+                record.update(run_engine(ALGORITHMS[name], graph, pairs,
+                                         heuristic if informed else None))
+                results.append(record)
+                print(f"{kind:>10} {size:>9} {name:>6} "
+                      f"median={record['median_ms']}ms "
+                      f"expanded={record['mean_nodes_expanded']}",
+                      file=sys.stderr)
+    return results
+
+
+def metadata(seed, queries):
+    """Environment details stored alongside results for regression tracking"""
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'queries': queries
+    }
+
+
+def write_results(results, meta, fmt, output):
+    """Write results as JSON (with metadata) or CSV (metadata per row)"""
+    stream = open(output, 'w', newline='') if output else sys.stdout
+    try:
+        if fmt == 'json':
+            json.dump({'meta': meta, 'results': results}, stream, indent=2)
+            stream.write('\n')
+        else:
+            rows = [{**{'commit': meta['commit'], 'seed': meta['seed']}, **r} for r in results]
+            if rows:
+                writer = csv.DictWriter(stream, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                writer.writerows(rows)
+    finally:
+        if output:
+            stream.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark search engines on synthetic graphs')
+    parser.add_argument('--kinds', nargs='+', default=sorted(GENERATORS), choices=sorted(GENERATORS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000])
+    parser.add_argument('--algorithms', nargs='+', default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument('--heuristic', default='auto', choices=HEURISTICS)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--output', help='File to write results to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.kinds, args.sizes, args.algorithms,
+                            args.queries, args.seed, args.heuristic)
+    write_results(results, metadata(args.seed, args.queries), args.format, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+"""
+Smart Courier - Memory-Bounded Search
+Beam A* and SMA* variants that degrade gracefully under a hard node cap
+"""
+
+import heapq
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from heuristics import TableHeuristic
+from limits import SearchBudget
+from profiling import phase
+
+
+DEFAULT_MAX_NODES = 10000
+
+# Rough footprint of one stored search node (dict entries, heap tuple, floats)
+BYTES_PER_NODE = 400
+
+# Bounded engines keep at most this many trace rows
+TRACE_LIMIT = 1000
+
+# SMA* regenerates forgotten nodes and can cycle forever when the goal is
+# unreachable; without a caller budget it gives up after this many expansions
+SMA_MAX_EXPANSIONS = 200000
+
+
+def memory_limits_from_request(data):
+    """Node cap for a bounded search from `max_open_nodes` / `max_memory_bytes`.
+
+    Raises ValueError for malformed limits.
+    """
+    limits = {}
+    for key in ('max_open_nodes', 'max_memory_bytes'):
+        value = data.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(f"{key} must be a positive integer")
+        limits[key] = value
+    return {
+        'max_nodes': limits.get('max_open_nodes'),
+        'max_memory_bytes': limits.get('max_memory_bytes')
+    }
+
+
+def _node_cap(max_nodes, max_memory_bytes):
+    """Tightest node cap implied by an explicit count and a byte budget"""
+    caps = [DEFAULT_MAX_NODES if max_nodes is None and max_memory_bytes is None else None]
+    if max_nodes is not None:
+        caps.append(max_nodes)
+    if max_memory_bytes is not None:
+        caps.append(max(1, max_memory_bytes // BYTES_PER_NODE))
+    return min(cap for cap in caps if cap is not None)
+
+
+# tracemalloc's peak is process-wide, so tracked searches run one at a time
+_TRACKER_LOCK = threading.Lock()
+
+
+@contextmanager
+def _memory_tracker(enabled):
+    """Measure peak traced allocations when `enabled` (tracemalloc is slow)"""
+    peak = {'bytes': None}
+    if not enabled:
+        yield peak
+        return
+    with _TRACKER_LOCK:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield peak
+        finally:
+            peak['bytes'] = tracemalloc.get_traced_memory()[1]
+            if started:
+                tracemalloc.stop()
+
+
+class _BoundedSearch:
+    """Shared bookkeeping for the memory-bounded engines"""
+
+    def __init__(self, graph, start, goal, heuristic=None, max_nodes=None,
+                 max_memory_bytes=None, track_memory=False, timer=None, budget=None):
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+        self.heuristic = heuristic or TableHeuristic(graph)
+        self.max_nodes = _node_cap(max_nodes, max_memory_bytes)
+        self.track_memory = track_memory
+        self.timer = timer
+        self.budget = budget
+        self.trace = []
+        self.nodes_expanded = 0
+        self.peak_open = 0
+        self.peak_stored = 0
+        self.forgotten = 0
+
+    def search(self):
+        with _memory_tracker(self.track_memory) as peak:
+            result = self._search()
+        result['memory'] = {
+            'max_nodes': self.max_nodes,
+            'peak_open_nodes': self.peak_open,
+            'peak_stored_nodes': self.peak_stored,
+            'forgotten_nodes': self.forgotten,
+            'estimated_peak_bytes': self.peak_stored * BYTES_PER_NODE,
+            'peak_traced_bytes': peak['bytes']
+        }
+        return result
+
+    def _record(self, node, g, f, open_size, stored):
+        if len(self.trace) < TRACE_LIMIT:
+            self.trace.append({
+                'step': self.nodes_expanded,
+                'node': node,
+                'g': round(g, 2),
+                'h': round(f - g, 2),
+                'f': round(f, 2),
+                'open_size': open_size,
+                'closed_size': stored - open_size
+            })
+
+    def _found(self, parent, cost):
+        with phase(self.timer, 'reconstruction'):
+            path = []
+            current = self.goal
+            while current is not None:
+                path.append(current)
+                current = parent[current]
+            path.reverse()
+        return {
+            'path': path,
+            'cost': round(cost, 2),
+            'nodes_expanded': self.nodes_expanded,
+            'trace': self.trace,
+            'success': True
+        }
+
+    def _not_found(self, error):
+        return {
+            'path': None,
+            'cost': float('inf'),
+            'nodes_expanded': self.nodes_expanded,
+            'trace': self.trace,
+            'success': False,
+            'error': error
+        }
+
+
+# ==================== ALGORITHM: BEAM A* ====================
+class BeamSearch(_BoundedSearch):
+    """A* that keeps at most `max_nodes` search nodes, expanded and open.
+
+    Expanded nodes are kept for path reconstruction, so the frontier is cut
+    back to the best entries that fit in what is left of the cap. Pruned
+    frontier nodes are dropped entirely, so the search may miss the optimal
+    path or fail outright once expanded nodes fill the cap.
+    """
+
+    def _search(self):
+        graph = self.graph
+        heuristic = self.heuristic
+        budget = self.budget
+        cap = self.max_nodes
+
+        open_list = [(heuristic(self.start), 0, self.start, 0)]
+        g_values = {self.start: 0}
+        parent = {self.start: None}
+        closed = set()
+        counter = 0
+
+        while open_list:
+            f_value, _, node, current_g = heapq.heappop(open_list)
+            if node in closed or current_g > g_values.get(node, float('inf')):
+                continue
+
+            self._record(node, current_g, f_value, len(open_list), len(g_values))
+            if node == self.goal:
+                return self._found(parent, current_g)
+
+            if budget is not None and budget.exhausted(self.nodes_expanded):
+                return budget.limit_result(self.nodes_expanded, self.trace)
+
+            closed.add(node)
+            self.nodes_expanded += 1
+
+            for neighbor, cost in graph.get_neighbors(node).items():
+                if neighbor in closed:
+                    continue
+                new_g = current_g + cost
+                if new_g < g_values.get(neighbor, float('inf')):
+                    g_values[neighbor] = new_g
+                    parent[neighbor] = node
+                    counter += 1
+                    heapq.heappush(open_list, (new_g + heuristic(neighbor), counter, neighbor, new_g))
+
+            if len(g_values) > cap or len(open_list) > cap:
+                # Only the current entry of each open node holds memory
+                live = [entry for entry in open_list
+                        if entry[2] not in closed and g_values.get(entry[2]) == entry[3]]
+                # A sorted list is a valid heap; forget everything past the cap
+                kept = heapq.nsmallest(max(0, cap - len(closed)), live)
+                kept_nodes = {entry[2] for entry in kept}
+                for _, _, dropped, _ in live:
+                    if dropped not in kept_nodes:
+                        del g_values[dropped]
+                        del parent[dropped]
+                self.forgotten += len(live) - len(kept)
+                open_list = kept
+
+            self.peak_open = max(self.peak_open, len(open_list))
+            self.peak_stored = max(self.peak_stored, len(g_values))
+
+        return self._not_found('No path found within the memory bound')
+
+
+# ==================== ALGORITHM: SMA* ====================
+class SMAStarSearch(_BoundedSearch):
+    """Simplified memory-bounded A*.
+
+    At most `max_nodes` search nodes (open and expanded) are kept. When the
+    cap is exceeded, expanded dead ends are dropped first, then the worst
+    open leaf is forgotten and its f-value is backed up into its parent. A
+    parent whose children have all been forgotten is reopened with that
+    backed-up value, so the forgotten subtree is regenerated only if it
+    becomes the most promising again. A non-goal node at depth
+    `max_nodes - 1` gets f = infinity, since no path through it fits in
+    memory; once only such nodes are left the search fails. Nodes are
+    expanded fully rather than one successor at a time. The path found is
+    optimal when the cap can hold it; a tighter cap trades optimality, then
+    completeness, for memory.
+    """
+
+    def _search(self):
+        graph = self.graph
+        heuristic = self.heuristic
+        # The caller's budget, plus a backstop against regeneration cycles
+        budgets = [SearchBudget(max_expansions=SMA_MAX_EXPANSIONS)]
+        if self.budget is not None:
+            budgets.insert(0, self.budget)
+        cap = self.max_nodes
+        infinity = float('inf')
+
+        g_values = {self.start: 0}
+        f_values = {self.start: heuristic(self.start)}
+        parent = {self.start: None}
+        depth = {self.start: 0}
+        children = {self.start: set()}
+        backed_up = {self.start: infinity}
+        open_nodes = {self.start}
+        # Expanded nodes left without children, kept until memory runs short
+        dead_ends = set()
+
+        # Min-heap for the best leaf, max-heap for the worst; both lazy. Ties
+        # expand the deepest leaf and forget the shallowest, as in SMA*
+        best = [(f_values[self.start], 0, 0, self.start)]
+        worst = [(-f_values[self.start], 0, 0, self.start)]
+        counter = 0
+
+        def push(node):
+            nonlocal counter
+            counter += 1
+            heapq.heappush(best, (f_values[node], -depth[node], counter, node))
+            heapq.heappush(worst, (-f_values[node], depth[node], counter, node))
+
+        def compact():
+            """Drop stale heap entries so the heaps stay proportional to the cap"""
+            best.clear()
+            worst.clear()
+            for node in open_nodes:
+                push(node)
+
+        def forget(node):
+            for table in (g_values, f_values, parent, depth, children, backed_up):
+                del table[node]
+            open_nodes.discard(node)
+            dead_ends.discard(node)
+
+        def forget_subtree(root):
+            """Forget everything below `root`"""
+            stack = list(children[root])
+            children[root] = set()
+            while stack:
+                descendant = stack.pop()
+                stack.extend(children[descendant])
+                forget(descendant)
+
+        def orphaned(owner):
+            """Handle an expanded node that has just lost its last child"""
+            if children[owner] or owner in open_nodes:
+                return
+            if backed_up[owner] < infinity or owner == self.start:
+                # Reopen with the best f forgotten below it
+                f_values[owner] = backed_up[owner]
+                backed_up[owner] = infinity
+                open_nodes.add(owner)
+                push(owner)
+                return
+            # Nothing useful is below it; keeping it stops it being re-expanded
+            dead_ends.add(owner)
+
+        def drop_dead_ends():
+            """Forget childless expanded nodes, and ancestors they leave empty"""
+            while dead_ends and len(g_values) > cap:
+                owner = dead_ends.pop()
+                if children[owner] or owner in open_nodes:
+                    continue
+                above = parent[owner]
+                children[above].discard(owner)
+                forget(owner)
+                orphaned(above)
+
+        def forget_worst_leaf():
+            while worst:
+                negative_f, _, _, node = heapq.heappop(worst)
+                if (node not in open_nodes or node == self.start
+                        or f_values[node] != -negative_f):
+                    continue
+                owner = parent[node]
+                backed_up[owner] = min(backed_up[owner], f_values[node])
+                children[owner].discard(node)
+                forget(node)
+                self.forgotten += 1
+                orphaned(owner)
+                return True
+            return False
+
+        while best:
+            f_value, _, _, node = heapq.heappop(best)
+            if node not in open_nodes or f_values[node] != f_value:
+                continue
+            if f_value == infinity:
+                break
+
+            current_g = g_values[node]
+            self._record(node, current_g, f_value, len(open_nodes), len(g_values))
+            if node == self.goal:
+                return self._found(parent, current_g)
+
+            for budget in budgets:
+                if budget.exhausted(self.nodes_expanded):
+                    return budget.limit_result(self.nodes_expanded, self.trace)
+
+            open_nodes.discard(node)
+            self.nodes_expanded += 1
+
+            for neighbor, cost in graph.get_neighbors(node).items():
+                new_g = current_g + cost
+                if neighbor in g_values:
+                    if new_g >= g_values[neighbor]:
+                        continue
+                    # Costs found below it are stale; it moves back to the
+                    # open list as a leaf under its cheaper parent
+                    forget_subtree(neighbor)
+                    backed_up[neighbor] = infinity
+                    previous = parent[neighbor]
+                    children[previous].discard(neighbor)
+                    children[node].add(neighbor)
+                    orphaned(previous)
+                else:
+                    children[neighbor] = set()
+                    backed_up[neighbor] = infinity
+                g_values[neighbor] = new_g
+                parent[neighbor] = node
+                depth[neighbor] = depth[node] + 1
+                if neighbor != self.goal and depth[neighbor] >= cap - 1:
+                    # Its path already fills memory, so it can never lead to the goal
+                    f_values[neighbor] = infinity
+                else:
+                    # Pathmax keeps f non-decreasing along a path
+                    f_values[neighbor] = max(f_value, new_g + heuristic(neighbor))
+                children[node].add(neighbor)
+                open_nodes.add(neighbor)
+                push(neighbor)
+
+            orphaned(node)
+
+            while len(g_values) > cap:
+                drop_dead_ends()
+                if len(g_values) <= cap or not forget_worst_leaf():
+                    break
+
+            if len(best) + len(worst) > 4 * cap:
+                compact()
+
+            self.peak_open = max(self.peak_open, len(open_nodes))
+            self.peak_stored = max(self.peak_stored, len(g_values))
+
+        return self._not_found('No path found within the memory bound')
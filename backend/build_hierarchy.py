@@ -0,0 +1,43 @@
+"""
+Smart Courier - Offline Hierarchy Builder
+Precomputes the HPA* hierarchy of the served graph for HPA_HIERARCHY_DIR
+
+Usage:
+    python build_hierarchy.py hierarchy/
+    python build_hierarchy.py hierarchy/ --cell-nodes 512
+"""
+
+import argparse
+import sys
+import time
+
+from app import load_graph
+from hierarchy import DEFAULT_CELL_NODES, GridPartition, Hierarchy
+
+
+def build(graph, directory, cell_nodes=DEFAULT_CELL_NODES):
+    """Build the hierarchy of `graph` and save it to `directory`"""
+    began = time.perf_counter()
+    hierarchy = Hierarchy.build(graph, GridPartition.for_graph(graph, cell_nodes))
+    hierarchy.save(directory)
+    return {
+        'nodes': len(graph.node_ids),
+        'cells': len(hierarchy.store.cell_ids()),
+        'elapsed_s': round(time.perf_counter() - began, 3)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompute the HPA* hierarchy of the served graph')
+    parser.add_argument('directory', help='Directory to write to; serve it with HPA_HIERARCHY_DIR')
+    parser.add_argument('--cell-nodes', type=int, default=DEFAULT_CELL_NODES,
+                        help='Target number of nodes per cell')
+    args = parser.parse_args(argv)
+
+    summary = build(load_graph(), args.directory, args.cell_nodes)
+    print(f"saved {summary['cells']} cells for {summary['nodes']} nodes to {args.directory} "
+          f"in {summary['elapsed_s']}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
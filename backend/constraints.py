@@ -0,0 +1,100 @@
+"""
+Smart Courier - Route Constraints
+Per-request avoidances and cost multipliers as an overlay on the shared graph
+"""
+
+import math
+
+
+class ConstrainedGraph:
+    """Read-only view of a graph with some nodes and edges removed or reweighted.
+
+    Only nodes next to a constraint get their own neighbour dict, built on
+    first use; every other lookup goes straight to the shared graph. The view
+    costs O(constraints) to build and never modifies the graph it wraps, so
+    concurrent requests can each use their own.
+    """
+
+    def __init__(self, graph, avoid_nodes=(), avoid_edges=(), multipliers=()):
+        self.graph = graph
+        self.avoid_nodes = frozenset(avoid_nodes)
+        self._removed = {}
+        self._factors = {}
+        self._overrides = {}
+
+        for node_id in self.avoid_nodes:
+            for neighbor in graph.get_neighbors(node_id):
+                self._removed.setdefault(neighbor, set()).add(node_id)
+        # Edges are stored in both directions, so constrain both
+        for from_node, to_node in avoid_edges:
+            self._removed.setdefault(from_node, set()).add(to_node)
+            self._removed.setdefault(to_node, set()).add(from_node)
+        for from_node, to_node, factor in multipliers:
+            self._factors.setdefault(from_node, {})[to_node] = factor
+            self._factors.setdefault(to_node, {})[from_node] = factor
+        self._touched = self._removed.keys() | self._factors.keys()
+
+    def __getattr__(self, name):
+        # Everything except neighbour lookups is the shared graph's
+        return getattr(self.graph, name)
+
+    def get_neighbors(self, node_id):
+        if node_id in self.avoid_nodes:
+            return {}
+        if node_id not in self._touched:
+            return self.graph.get_neighbors(node_id)
+        neighbors = self._overrides.get(node_id)
+        if neighbors is None:
+            removed = self._removed.get(node_id, ())
+            factors = self._factors.get(node_id, {})
+            neighbors = {neighbor: cost * factors.get(neighbor, 1)
+                         for neighbor, cost in self.graph.get_neighbors(node_id).items()
+                         if neighbor not in removed}
+            self._overrides[node_id] = neighbors
+        return neighbors
+
+
+def _edge(graph, item, name, size):
+    """(from, to, ...) from a list or a {'from', 'to', ...} object"""
+    if isinstance(item, dict):
+        item = [item.get('from'), item.get('to')] + ([item.get('factor')] if size == 3 else [])
+    if not isinstance(item, (list, tuple)) or len(item) != size:
+        raise ValueError(f"{name} entries must be [from, to{', factor' if size == 3 else ''}]")
+    from_node, to_node = item[0], item[1]
+    try:
+        present = to_node in graph.edges.get(from_node, {})
+    except TypeError:
+        present = False
+    if not present:
+        raise ValueError(f"{name} refers to a missing edge {from_node}-{to_node}")
+    return tuple(item)
+
+
+def constraints_from_request(graph, data):
+    """Overlay for `avoid_nodes`, `avoid_edges` and `cost_multipliers`.
+
+    Returns None when the request has no constraints. Multipliers must be at
+    least 1 so the coordinate heuristics stay admissible. Raises ValueError
+    for malformed constraints.
+    """
+    avoid_nodes = data.get('avoid_nodes') or []
+    avoid_edges = data.get('avoid_edges') or []
+    multipliers = data.get('cost_multipliers') or []
+    if not (avoid_nodes or avoid_edges or multipliers):
+        return None
+    for name, value in (('avoid_nodes', avoid_nodes), ('avoid_edges', avoid_edges),
+                        ('cost_multipliers', multipliers)):
+        if not isinstance(value, list):
+            raise ValueError(f"{name} must be a list")
+
+    for node_id in avoid_nodes:
+        if isinstance(node_id, (list, dict)) or node_id not in graph.nodes:
+            raise ValueError(f"avoid_nodes refers to an unknown node {node_id}")
+    edges = [_edge(graph, item, 'avoid_edges', 2) for item in avoid_edges]
+    factors = [_edge(graph, item, 'cost_multipliers', 3) for item in multipliers]
+    for _, _, factor in factors:
+        if (isinstance(factor, bool) or not isinstance(factor, (int, float))
+                or not math.isfinite(factor) or factor < 1):
+            raise ValueError('cost_multipliers factors must be finite numbers of at least 1; '
+                             'close edges with avoid_edges')
+    return ConstrainedGraph(graph, avoid_nodes, edges, factors)
@@ -0,0 +1,205 @@
+"""
+Smart Courier - Fleet Dispatch
+Nearest-courier lookup and batched assignment with multi-source search
+"""
+
+import heapq
+
+from heuristics import resolve_heuristic
+from search_context import SEARCH_POOL
+
+
+def _multi_source_search(graph, context, sources, targets, heuristic=None, budget=None,
+                         spent=0):
+    """Grow one shortest-path forest from every source at once.
+
+    Each node ends up in the tree of its closest source, so walking parent
+    pointers from a settled target leads back to its nearest source. Edges
+    are bidirectional, so courier-to-parcel and parcel-to-courier costs are
+    the same. Stops once every target is settled, or when `budget` runs out
+    (`spent` expansions were already charged to it by earlier searches).
+
+    Returns ({target index: cost}, nodes expanded, whether the budget ran out).
+    """
+    node_index = graph.node_index
+    node_ids = graph.node_ids
+    generation = context.generation
+    g_values = context.g
+    parent = context.parent
+    seen = context.seen
+    closed = context.closed
+
+    open_list = []
+    counter = 0
+    for source in sources:
+        if seen[source] != generation:
+            context.visit(source, 0, -1)
+            h_value = heuristic(node_ids[source]) if heuristic is not None else 0
+            counter += 1
+            heapq.heappush(open_list, (h_value, counter, source, 0))
+
+    remaining = set(targets)
+    found = {}
+    expanded = 0
+
+    while open_list and remaining:
+        _, _, current, current_g = heapq.heappop(open_list)
+        if closed[current] == generation:
+            continue
+        if budget is not None and budget.exhausted(spent + expanded):
+            return found, expanded, True
+        closed[current] = generation
+        expanded += 1
+
+        if current in remaining:
+            remaining.discard(current)
+            found[current] = current_g
+            if not remaining:
+                break
+
+        for neighbor, cost in graph.get_neighbors(node_ids[current]).items():
+            neighbor_index = node_index[neighbor]
+            if closed[neighbor_index] == generation:
+                continue
+            new_g = current_g + cost
+            if seen[neighbor_index] != generation or new_g < g_values[neighbor_index]:
+                g_values[neighbor_index] = new_g
+                parent[neighbor_index] = current
+                seen[neighbor_index] = generation
+                h_value = heuristic(neighbor) if heuristic is not None else 0
+                counter += 1
+                heapq.heappush(open_list, (new_g + h_value, counter, neighbor_index, new_g))
+
+    return found, expanded, False
+
+
+def _courier_nodes(couriers):
+    """Group (courier key, node) pairs by node, keeping request order"""
+    by_node = {}
+    for courier_id, node in couriers:
+        by_node.setdefault(node, []).append(courier_id)
+    return by_node
+
+
+def nearest_courier(graph, parcel, couriers, heuristic='auto', budget=None):
+    """Find the courier with the cheapest route to `parcel`.
+
+    `couriers` is a list of (courier id, node) pairs. A single A* is seeded
+    with every courier node and aimed at the parcel, so the cost no longer
+    grows with one search per courier.
+    """
+    by_node = _courier_nodes(couriers)
+    sources = [graph.node_index[node] for node in by_node]
+    target = graph.node_index[parcel]
+    provider = resolve_heuristic(graph, parcel, heuristic)
+
+    with SEARCH_POOL.lease(graph) as context:
+        found, expanded, limited = _multi_source_search(graph, context, sources, [target],
+                                                        provider, budget)
+        if limited:
+            return {
+                'success': False,
+                'parcel': parcel,
+                'nodes_expanded': expanded,
+                'error': 'Search limit exceeded',
+                'limit': budget.limit()
+            }
+        if target not in found:
+            return {
+                'success': False,
+                'parcel': parcel,
+                'nodes_expanded': expanded,
+                'error': 'No courier can reach the parcel'
+            }
+        path = context.reconstruct_path(graph.node_ids, target)
+
+    return {
+        'success': True,
+        'parcel': parcel,
+        'courier': by_node[path[0]][0],
+        'courier_node': path[0],
+        'path': path,
+        'cost': round(found[target], 2),
+        'nodes_expanded': expanded
+    }
+
+
+def assign_parcels(graph, parcels, couriers, capacity=None, budget=None):
+    """Assign many parcels to many couriers with shared search trees.
+
+    `parcels` and `couriers` are lists of (id, node) pairs. Each round grows a
+    single forest from every courier that still has capacity and reads off
+    the nearest courier for every open parcel. Couriers take their closest
+    parcels first, up to `capacity`; parcels that lose out are retried in the
+    next round without the saturated couriers. With no capacity limit one
+    round is enough. Assignment is greedy nearest-first, not a globally
+    optimal matching.
+
+    `budget` covers all rounds together. When it runs out, parcels already
+    settled in that round are still assigned and the rest are returned as
+    unassigned, with the limit that was hit.
+    """
+    node_index = graph.node_index
+    # Couriers, like parcels, are tracked by position because ids need not be unique
+    load = [0] * len(couriers)
+    open_parcels = list(parcels)
+    assignments = []
+    expanded = 0
+    rounds = 0
+    limited = False
+
+    while open_parcels and not limited:
+        available = [(courier, node) for courier, (_, node) in enumerate(couriers)
+                     if capacity is None or load[courier] < capacity]
+        if not available:
+            break
+        by_node = _courier_nodes(available)
+        sources = [node_index[node] for node in by_node]
+        targets = {node_index[node] for _, node in open_parcels}
+        rounds += 1
+
+        with SEARCH_POOL.lease(graph) as context:
+            found, round_expanded, limited = _multi_source_search(
+                graph, context, sources, targets, budget=budget, spent=expanded)
+            expanded += round_expanded
+            candidates = []
+            for position, (parcel_id, node) in enumerate(open_parcels):
+                target = node_index[node]
+                if target in found:
+                    path = context.reconstruct_path(graph.node_ids, target)
+                    candidates.append((found[target], position, parcel_id, node, path))
+
+        # Closest parcels claim couriers first
+        candidates.sort(key=lambda candidate: candidate[0])
+        assigned = set()
+        for cost, position, parcel_id, node, path in candidates:
+            for courier in by_node[path[0]]:
+                if capacity is None or load[courier] < capacity:
+                    load[courier] += 1
+                    assigned.add(position)
+                    assignments.append({
+                        'parcel': parcel_id,
+                        'parcel_node': node,
+                        'courier': couriers[courier][0],
+                        'courier_node': path[0],
+                        'path': path,
+                        'cost': round(cost, 2)
+                    })
+                    break
+
+        if not assigned:
+            break
+        open_parcels = [parcel for position, parcel in enumerate(open_parcels)
+                        if position not in assigned]
+
+    result = {
+        'success': not open_parcels,
+        'assignments': assignments,
+        'unassigned': [parcel_id for parcel_id, _ in open_parcels],
+        'rounds': rounds,
+        'nodes_expanded': expanded
+    }
+    if limited and open_parcels:
+        result['error'] = 'Search limit exceeded'
+        result['limit'] = budget.limit()
+    return result
@@ -0,0 +1,133 @@
+"""
+Smart Courier - Synthetic Graph Generators
+Seeded large-graph generators for scaling tests and benchmarks
+"""
+
+import math
+import random
+
+from graph import Graph
+
+
+def grid_graph(width, height, obstacle_ratio=0.2, diagonal=False, seed=0):
+    """Grid with randomly blocked cells.
+
+    Node ids are integers `y * width + x`. Orthogonal moves cost 1 and, when
+    `diagonal` is set, diagonal moves cost sqrt(2).
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    open_cells = [rng.random() >= obstacle_ratio for _ in range(width * height)]
+
+    for y in range(height):
+        for x in range(width):
+            node_id = y * width + x
+            if open_cells[node_id]:
+                graph.add_node(node_id, x, y, 0.0)
+
+    moves = [(1, 0, 1.0), (0, 1, 1.0)]
+    if diagonal:
+        moves += [(1, 1, math.sqrt(2)), (-1, 1, math.sqrt(2))]
+
+    for y in range(height):
+        for x in range(width):
+            node_id = y * width + x
+            if not open_cells[node_id]:
+                continue
+            for dx, dy, cost in moves:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and ny < height:
+                    neighbor = ny * width + nx
+                    if open_cells[neighbor]:
+                        graph.add_edge(node_id, neighbor, cost)
+
+    return graph
+
+
+def random_geometric_graph(n, avg_degree=6, seed=0):
+    """Random geometric graph with edge cost equal to Euclidean distance.
+
+    Points are spread over a square of side sqrt(n) so the density, and hence
+    the average degree for the derived connection radius, stays constant as
+    `n` grows.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    side = math.sqrt(n)
+    radius = math.sqrt(avg_degree / math.pi)
+
+    # Bucket points into radius-sized cells so neighbour lookup is local
+    buckets = {}
+    points = []
+    for node_id in range(n):
+        x = rng.uniform(0, side)
+        y = rng.uniform(0, side)
+        points.append((x, y))
+        graph.add_node(node_id, x, y, 0.0)
+        buckets.setdefault((int(x // radius), int(y // radius)), []).append(node_id)
+
+    for node_id, (x, y) in enumerate(points):
+        cx, cy = int(x // radius), int(y // radius)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other in buckets.get((cx + dx, cy + dy), ()):
+                    if other <= node_id:
+                        continue
+                    ox, oy = points[other]
+                    distance = math.hypot(ox - x, oy - y)
+                    if distance <= radius:
+                        graph.add_edge(node_id, other, distance)
+
+    return graph
+
+
+def road_network(n, arterial_every=8, removal_ratio=0.15, seed=0):
+    """Road-like planar graph built from a jittered lattice.
+
+    Lattice edges are randomly removed to break up the grid. Local streets cost
+    their length times a congestion factor in [1.0, 1.5]; every
+    `arterial_every`-th row and column is an arterial whose edges are never
+    removed and cost 0.7 times their length.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    side = max(1, int(math.ceil(math.sqrt(n))))
+
+    points = {}
+    for node_id in range(n):
+        row, col = divmod(node_id, side)
+        x = col + rng.uniform(-0.3, 0.3)
+        y = row + rng.uniform(-0.3, 0.3)
+        points[node_id] = (x, y)
+        graph.add_node(node_id, x, y, 0.0)
+
+    for node_id in range(n):
+        row, col = divmod(node_id, side)
+        x, y = points[node_id]
+        for neighbor, arterial in ((node_id + 1, row % arterial_every == 0),
+                                   (node_id + side, col % arterial_every == 0)):
+            if neighbor >= n or (neighbor == node_id + 1 and col + 1 >= side):
+                continue
+            if not arterial and rng.random() < removal_ratio:
+                continue
+            nx, ny = points[neighbor]
+            length = math.hypot(nx - x, ny - y)
+            factor = 0.7 if arterial else rng.uniform(1.0, 1.5)
+            graph.add_edge(node_id, neighbor, length * factor)
+
+    return graph
+
+
+GENERATORS = {
+    'grid': lambda n, seed: grid_graph(
+        int(math.ceil(math.sqrt(n))), int(math.ceil(math.sqrt(n))), seed=seed),
+    'geometric': lambda n, seed: random_geometric_graph(n, seed=seed),
+    'road': lambda n, seed: road_network(n, seed=seed)
+}
+
+
+def generate(kind, n, seed=0):
+    """Build a graph of roughly `n` nodes by generator name"""
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown graph kind: {kind}")
+    return GENERATORS[kind](n, seed)
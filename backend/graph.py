@@ -0,0 +1,57 @@
+"""
+Smart Courier - Graph
+Road network representation shared by the API, engines and generators
+"""
+
+
+class Graph:
+    """Graph representation with nodes and edges"""
+    
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+        self.coordinates = {}
+        self.heuristics = {}
+        self.node_index = {}
+        self.node_ids = []
+        self.version = 0
+        
+    def _register(self, node_id):
+        """Assign a dense integer index used by pooled search contexts"""
+        if node_id not in self.node_index:
+            self.node_index[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+        
+    def add_node(self, node_id, x, y, h_value):
+        """Add node with coordinates and heuristic value"""
+        self._register(node_id)
+        self.version += 1
+        self.nodes[node_id] = {'x': x, 'y': y}
+        self.coordinates[node_id] = (x, y)
+        self.heuristics[node_id] = h_value
+        self.edges[node_id] = {}
+        
+    def add_edge(self, from_node, to_node, cost):
+        """Add bidirectional edge"""
+        if from_node not in self.edges:
+            self._register(from_node)
+            self.edges[from_node] = {}
+        if to_node not in self.edges:
+            self._register(to_node)
+            self.edges[to_node] = {}
+            
+        self.version += 1
+        self.edges[from_node][to_node] = cost
+        self.edges[to_node][from_node] = cost
+        
+    def get_neighbors(self, node_id):
+        """Get neighbors and costs"""
+        return self.edges.get(node_id, {})
+    
+    def get_heuristic(self, node_id):
+        """Get heuristic value for node"""
+        return self.heuristics.get(node_id, 0)
+    
+    def get_coordinate(self, node_id):
+        """Get node coordinates"""
+        return self.coordinates.get(node_id, (0, 0))
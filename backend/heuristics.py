@@ -0,0 +1,201 @@
+"""
+Smart Courier - Heuristic Providers
+Goal-aware admissible heuristics derived from node coordinates
+"""
+
+import math
+import weakref
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batches fall back to pure Python
+    np = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+SQRT2_MINUS_1 = math.sqrt(2) - 1
+
+# Below this many candidates a plain loop beats NumPy's call overhead
+VECTOR_THRESHOLD = 32
+
+
+# ==================== DISTANCE METRICS ====================
+def euclidean(a, b):
+    """Straight-line distance"""
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def manhattan(a, b):
+    """Sum of axis distances"""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def octile(a, b):
+    """Distance with 8-way moves where diagonals cost sqrt(2)"""
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    return max(dx, dy) + SQRT2_MINUS_1 * min(dx, dy)
+
+
+def haversine(a, b):
+    """Great-circle distance in km, with coordinates as (lon, lat) degrees"""
+    lon1, lat1 = math.radians(a[0]), math.radians(a[1])
+    lon2, lat2 = math.radians(b[0]), math.radians(b[1])
+    h = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+METRICS = {
+    'euclidean': euclidean,
+    'manhattan': manhattan,
+    'octile': octile,
+    'haversine': haversine
+}
+
+
+def _vector_distance(metric, xs, ys, goal):
+    """NumPy version of `metric` from arrays of x and y to the goal"""
+    gx, gy = goal
+    if metric == 'euclidean':
+        return np.hypot(xs - gx, ys - gy)
+    if metric == 'manhattan':
+        return np.abs(xs - gx) + np.abs(ys - gy)
+    if metric == 'octile':
+        dx = np.abs(xs - gx)
+        dy = np.abs(ys - gy)
+        return np.maximum(dx, dy) + SQRT2_MINUS_1 * np.minimum(dx, dy)
+    lon1, lat1 = np.radians(xs), np.radians(ys)
+    lon2, lat2 = math.radians(gx), math.radians(gy)
+    h = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * math.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+
+# ==================== GRAPH-LEVEL CACHES ====================
+# Per-graph derived data, dropped with the graph and rebuilt when its version changes
+_SCALE_CACHE = weakref.WeakKeyDictionary()
+_COORDINATE_CACHE = weakref.WeakKeyDictionary()
+_TABLE_CACHE = weakref.WeakKeyDictionary()
+
+
+def admissible_scale(graph, metric='euclidean'):
+    """Minimum edge cost per unit of `metric` distance over the whole graph.
+
+    Multiplying any metric distance by this ratio can never exceed the cost of
+    a real path, because every edge on that path costs at least `scale` times
+    its own length and the metric obeys the triangle inequality.
+    """
+    cached = _SCALE_CACHE.setdefault(graph, {})
+    entry = cached.get(metric)
+    if entry is not None and entry[0] == graph.version:
+        return entry[1]
+
+    distance = METRICS[metric]
+    scale = None
+    for from_node, neighbors in graph.edges.items():
+        a = graph.get_coordinate(from_node)
+        for to_node, cost in neighbors.items():
+            length = distance(a, graph.get_coordinate(to_node))
+            if length > 0:
+                ratio = cost / length
+                if scale is None or ratio < scale:
+                    scale = ratio
+
+    # Shave a hair off so rounding can never tip h(n) above the true cost
+    scale = 0.0 if scale is None else max(0.0, scale) * (1 - 1e-9)
+    cached[metric] = (graph.version, scale)
+    return scale
+
+
+def coordinate_arrays(graph):
+    """x and y coordinates as NumPy arrays ordered by node index"""
+    entry = _COORDINATE_CACHE.get(graph)
+    if entry is not None and entry[0] == graph.version:
+        return entry[1], entry[2]
+
+    coordinates = [graph.get_coordinate(node_id) for node_id in graph.node_ids]
+    xs = np.array([c[0] for c in coordinates], dtype=float)
+    ys = np.array([c[1] for c in coordinates], dtype=float)
+    _COORDINATE_CACHE[graph] = (graph.version, xs, ys)
+    return xs, ys
+
+
+def has_heuristic_table(graph):
+    """Whether the graph stores any non-zero heuristic values"""
+    entry = _TABLE_CACHE.get(graph)
+    if entry is None or entry[0] != graph.version:
+        entry = (graph.version, any(graph.heuristics.values()))
+        _TABLE_CACHE[graph] = entry
+    return entry[1]
+
+
+# ==================== PROVIDERS ====================
+class TableHeuristic:
+    """Heuristic values stored on the graph (only valid for their own goal)"""
+
+    name = 'table'
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __call__(self, node_id):
+        return self.graph.get_heuristic(node_id)
+
+    def batch(self, indices):
+        """Heuristic values for a list of node indices"""
+        node_ids = self.graph.node_ids
+        get = self.graph.heuristics.get
+        return [get(node_ids[i], 0) for i in indices]
+
+
+class CoordinateHeuristic:
+    """Admissible heuristic computed on the fly from coordinates to a goal"""
+
+    def __init__(self, graph, goal, metric='euclidean'):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown heuristic: {metric}")
+        self.graph = graph
+        self.name = metric
+        self.distance = METRICS[metric]
+        self.goal_coordinate = graph.get_coordinate(goal)
+        self.scale = admissible_scale(graph, metric)
+
+    def __call__(self, node_id):
+        return self.scale * self.distance(self.graph.get_coordinate(node_id), self.goal_coordinate)
+
+    def batch(self, indices):
+        """Heuristic values for a list of node indices.
+
+        Large batches are evaluated in one vectorized pass over cached
+        coordinate arrays when NumPy is available.
+        """
+        if np is not None and len(indices) >= VECTOR_THRESHOLD:
+            xs, ys = coordinate_arrays(self.graph)
+            picked = np.asarray(indices, dtype=np.intp)
+            values = _vector_distance(self.name, xs[picked], ys[picked], self.goal_coordinate)
+            return (values * self.scale).tolist()
+
+        node_ids = self.graph.node_ids
+        coordinate = self.graph.get_coordinate
+        distance = self.distance
+        goal = self.goal_coordinate
+        scale = self.scale
+        return [scale * distance(coordinate(node_ids[i]), goal) for i in indices]
+
+
+HEURISTICS = ['auto', 'table'] + list(METRICS)
+
+
+def resolve_heuristic(graph, goal, name='auto'):
+    """Build the heuristic provider requested for a query.
+
+    'auto' keeps the stored table when it has values and is aimed at this
+    goal (h(goal) is zero), and otherwise falls back to the Euclidean provider.
+    """
+    if name == 'auto':
+        aimed = has_heuristic_table(graph) and graph.get_heuristic(goal) == 0
+        name = 'table' if aimed else 'euclidean'
+    if name == 'table':
+        return TableHeuristic(graph)
+    return CoordinateHeuristic(graph, goal, name)
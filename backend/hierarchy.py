@@ -0,0 +1,459 @@
+"""
+Smart Courier - Hierarchical Path-Finding (HPA*)
+Grid partitioning, per-cell boundary distance tables and abstract-level search
+"""
+
+import hashlib
+import heapq
+import math
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+
+from heuristics import CoordinateHeuristic
+from profiling import phase
+
+
+# Target number of nodes per cell when no cell size is given
+DEFAULT_CELL_NODES = 256
+
+# Largest graph whose hierarchy the server builds on demand; bigger ones must
+# be built offline with build_hierarchy.py and served from HPA_HIERARCHY_DIR
+ON_DEMAND_MAX_NODES = 20000
+
+# Abstract-level stand-ins for the query's start and goal
+START = object()
+GOAL = object()
+
+
+# ==================== PARTITIONING ====================
+class GridPartition:
+    """Split the plane into square cells of side `cell_size`"""
+
+    def __init__(self, cell_size, origin=(0.0, 0.0)):
+        self.cell_size = cell_size
+        self.origin = origin
+
+    def cell_of(self, coordinate):
+        """Cell id (column, row) containing a coordinate"""
+        return (int(math.floor((coordinate[0] - self.origin[0]) / self.cell_size)),
+                int(math.floor((coordinate[1] - self.origin[1]) / self.cell_size)))
+
+    @classmethod
+    def for_graph(cls, graph, cell_nodes=DEFAULT_CELL_NODES):
+        """Partition sized so each cell holds about `cell_nodes` nodes"""
+        coordinates = [graph.get_coordinate(node_id) for node_id in graph.node_ids]
+        if not coordinates:
+            return cls(1.0)
+        min_x = min(c[0] for c in coordinates)
+        min_y = min(c[1] for c in coordinates)
+        span = max(max(c[0] for c in coordinates) - min_x,
+                   max(c[1] for c in coordinates) - min_y, 1e-9)
+        cells_per_side = max(1, int(math.ceil(math.sqrt(len(coordinates) / cell_nodes))))
+        # Pad slightly so the maximum coordinate falls inside the last cell
+        return cls(span * (1 + 1e-9) / cells_per_side, (min_x, min_y))
+
+
+def _cell_dijkstra(graph, source, members, targets=None):
+    """Shortest paths from `source` that never leave `members`.
+
+    Returns (distances, parents, settled). When `targets` is given the search
+    stops once all of them are settled.
+    """
+    distances = {source: 0}
+    parents = {source: None}
+    settled = set()
+    remaining = set(targets) if targets is not None else None
+    heap = [(0, 0, source)]
+    counter = 0
+
+    while heap:
+        distance, _, node = heapq.heappop(heap)
+        if node in settled:
+            continue
+        settled.add(node)
+        if remaining is not None:
+            remaining.discard(node)
+            if not remaining:
+                break
+        for neighbor, cost in graph.get_neighbors(node).items():
+            if neighbor not in members or neighbor in settled:
+                continue
+            new_distance = distance + cost
+            if neighbor not in distances or new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                parents[neighbor] = node
+                counter += 1
+                heapq.heappush(heap, (new_distance, counter, neighbor))
+
+    return distances, parents, len(settled)
+
+
+def _prune_tree(parents, targets):
+    """Keep only the parent pointers on paths to `targets`"""
+    kept = {}
+    for target in targets:
+        node = target
+        while node is not None and node not in kept and node in parents:
+            kept[node] = parents[node]
+            node = parents[node]
+    return kept
+
+
+def graph_fingerprint(graph):
+    """Digest of node ids, coordinates and edges, to match saved hierarchies to graphs"""
+    digest = hashlib.sha1()
+    for node_id in graph.node_ids:
+        neighbors = sorted(graph.get_neighbors(node_id).items(), key=repr)
+        digest.update(repr((node_id, graph.get_coordinate(node_id), neighbors)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _walk(parents, node):
+    """Follow parent pointers from `node` to the tree root"""
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    return path
+
+
+# ==================== CELL STORES ====================
+class MemoryCellStore:
+    """Cell data held in memory"""
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.loads = 0
+
+    def get(self, cell_id):
+        return self.cells.get(cell_id)
+
+    def cell_ids(self):
+        return list(self.cells)
+
+
+class DiskCellStore:
+    """Cell data paged in from one file per cell, with an LRU of loaded cells"""
+
+    def __init__(self, directory, cell_ids, max_cached=64):
+        self.directory = directory
+        self._cell_ids = set(cell_ids)
+        self.max_cached = max_cached
+        self.cache = OrderedDict()
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def get(self, cell_id):
+        if cell_id not in self._cell_ids:
+            return None
+        with self._lock:
+            cell = self.cache.get(cell_id)
+            if cell is not None:
+                self.cache.move_to_end(cell_id)
+                return cell
+        with open(os.path.join(self.directory, _cell_filename(cell_id)), 'rb') as handle:
+            cell = pickle.load(handle)
+        with self._lock:
+            self.loads += 1
+            self.cache[cell_id] = cell
+            while len(self.cache) > self.max_cached:
+                self.cache.popitem(last=False)
+        return cell
+
+    def cell_ids(self):
+        return list(self._cell_ids)
+
+
+def _cell_filename(cell_id):
+    return f"cell_{cell_id[0]}_{cell_id[1]}.pickle"
+
+
+# ==================== HIERARCHY ====================
+class Hierarchy:
+    """Two-level graph abstraction.
+
+    The index (always in memory) holds the partition, which cell every
+    boundary node belongs to and the edges linking boundary nodes of
+    neighbouring cells. Per-cell data (members, boundary-to-boundary costs and
+    the trees needed to refine them) lives in a cell store and is only read
+    when a query touches that cell.
+    """
+
+    def __init__(self, partition, boundary_cell, links, store, graph_version=None,
+                 fingerprint=None):
+        self.partition = partition
+        self.boundary_cell = boundary_cell
+        self.links = links
+        self.store = store
+        self.graph_version = graph_version
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, graph, partition=None):
+        """Partition `graph` and precompute boundary-to-boundary costs per cell"""
+        partition = partition or GridPartition.for_graph(graph)
+        node_cell = {node_id: partition.cell_of(graph.get_coordinate(node_id))
+                     for node_id in graph.node_ids}
+
+        members = {}
+        for node_id, cell_id in node_cell.items():
+            members.setdefault(cell_id, set()).add(node_id)
+
+        boundary_cell = {}
+        links = {}
+        for node_id, cell_id in node_cell.items():
+            for neighbor, cost in graph.get_neighbors(node_id).items():
+                if node_cell[neighbor] != cell_id:
+                    boundary_cell[node_id] = cell_id
+                    links.setdefault(node_id, []).append((neighbor, cost))
+
+        cells = {}
+        for cell_id, cell_members in members.items():
+            boundary = [node_id for node_id in cell_members if node_id in boundary_cell]
+            distances = {}
+            trees = {}
+            for source in boundary:
+                dist, parents, _ = _cell_dijkstra(graph, source, cell_members, boundary)
+                reached = [b for b in boundary if b != source and b in dist]
+                distances[source] = {b: dist[b] for b in reached}
+                trees[source] = _prune_tree(parents, reached)
+            cells[cell_id] = {
+                'members': cell_members,
+                'boundary': boundary,
+                'distances': distances,
+                'trees': trees
+            }
+
+        return cls(partition, boundary_cell, links, MemoryCellStore(cells), graph.version,
+                   graph_fingerprint(graph))
+
+    def save(self, directory):
+        """Write the index and one file per cell to `directory`"""
+        os.makedirs(directory, exist_ok=True)
+        cell_ids = self.store.cell_ids()
+        for cell_id in cell_ids:
+            with open(os.path.join(directory, _cell_filename(cell_id)), 'wb') as handle:
+                pickle.dump(self.store.get(cell_id), handle, protocol=pickle.HIGHEST_PROTOCOL)
+        index = {
+            'cell_size': self.partition.cell_size,
+            'origin': self.partition.origin,
+            'boundary_cell': self.boundary_cell,
+            'links': self.links,
+            'cell_ids': cell_ids,
+            'graph_version': self.graph_version,
+            'fingerprint': self.fingerprint
+        }
+        with open(os.path.join(directory, 'index.pickle'), 'wb') as handle:
+            pickle.dump(index, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, directory, max_cached_cells=64):
+        """Open a saved hierarchy; cells are only read when first touched"""
+        with open(os.path.join(directory, 'index.pickle'), 'rb') as handle:
+            index = pickle.load(handle)
+        store = DiskCellStore(directory, index['cell_ids'], max_cached_cells)
+        partition = GridPartition(index['cell_size'], index['origin'])
+        return cls(partition, index['boundary_cell'], index['links'], store,
+                   index['graph_version'], index.get('fingerprint'))
+
+
+# Graph -> (graph version, hierarchy or None when none is available)
+_HIERARCHY_CACHE = weakref.WeakKeyDictionary()
+_HIERARCHY_LOCKS = weakref.WeakKeyDictionary()
+_HIERARCHY_LOCK = threading.Lock()
+
+
+def _saved_hierarchy(graph, directory):
+    """Hierarchy saved in `directory` from this exact graph, or None"""
+    if directory is None or not os.path.exists(os.path.join(directory, 'index.pickle')):
+        return None
+    hierarchy = Hierarchy.load(directory)
+    if hierarchy.fingerprint != graph_fingerprint(graph):
+        return None
+    hierarchy.graph_version = graph.version
+    return hierarchy
+
+
+def hierarchy_for(graph, directory=None, build_limit=None):
+    """Hierarchy for `graph`, looked up once per graph version.
+
+    A hierarchy saved in `directory` is used when it was built from this
+    graph; only its index is read, and cells are paged in as queries touch
+    them. Otherwise the hierarchy is built in memory, unless the graph has
+    more than `build_limit` nodes, in which case ValueError is raised.
+    """
+    with _HIERARCHY_LOCK:
+        lock = _HIERARCHY_LOCKS.setdefault(graph, threading.Lock())
+    # Held per graph, so a slow build does not stall queries on other graphs
+    with lock:
+        cached = _HIERARCHY_CACHE.get(graph)
+        if cached is not None and cached[0] == graph.version:
+            hierarchy = cached[1]
+        else:
+            hierarchy = _saved_hierarchy(graph, directory)
+            if hierarchy is None and (build_limit is None or len(graph.node_ids) <= build_limit):
+                hierarchy = Hierarchy.build(graph)
+            _HIERARCHY_CACHE[graph] = (graph.version, hierarchy)
+    if hierarchy is None:
+        raise ValueError('No saved hierarchy matches this graph, and it is too large '
+                         'to build on demand; run build_hierarchy.py')
+    return hierarchy
+
+
+# ==================== ALGORITHM: HPA* ====================
+class HPASearch:
+    """Hierarchical A* over a partitioned graph.
+
+    The abstract level contains only cell boundary nodes. Start and goal are
+    connected to their cell's boundary with a cell-local search, A* runs over
+    the abstract graph, and only the edges on the chosen corridor are refined
+    back into concrete nodes. Because boundary-to-boundary costs are exact
+    within each cell, the returned path is optimal.
+    """
+
+    def __init__(self, graph, start, goal, hierarchy=None, heuristic=None, timer=None,
+                 budget=None):
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+        self.hierarchy = hierarchy or hierarchy_for(graph)
+        self.heuristic = heuristic or CoordinateHeuristic(graph, goal)
+        self.timer = timer
+        self.budget = budget
+        self.trace = []
+        self.nodes_expanded = 0
+        self.cells_touched = set()
+
+    def _cell(self, cell_id):
+        self.cells_touched.add(cell_id)
+        return self.hierarchy.store.get(cell_id)
+
+    def search(self):
+        """Execute HPA* search"""
+        graph = self.graph
+        hierarchy = self.hierarchy
+        partition = hierarchy.partition
+        start_cell_id = partition.cell_of(graph.get_coordinate(self.start))
+        goal_cell_id = partition.cell_of(graph.get_coordinate(self.goal))
+        start_cell = self._cell(start_cell_id)
+        goal_cell = self._cell(goal_cell_id)
+
+        # Connect start and goal to the boundary of their own cells
+        start_dist, start_tree, settled = _cell_dijkstra(graph, self.start, start_cell['members'])
+        self.nodes_expanded += settled
+        goal_dist, goal_tree, settled = _cell_dijkstra(graph, self.goal, goal_cell['members'])
+        self.nodes_expanded += settled
+
+        heuristic = self.heuristic
+        open_list = [(heuristic(self.start), 0, START, 0)]
+        g_values = {START: 0}
+        parent = {START: None}
+        closed = set()
+        counter = 0
+        step = 0
+
+        while open_list:
+            f_value, _, key, current_g = heapq.heappop(open_list)
+            if key in closed:
+                continue
+
+            node = self.start if key is START else self.goal if key is GOAL else key
+            self.trace.append({
+                'step': step,
+                'node': node,
+                'g': round(current_g, 2),
+                'h': round(f_value - current_g, 2),
+                'f': round(f_value, 2),
+                'open_size': len(open_list),
+                'closed_size': len(closed),
+                'level': 'abstract'
+            })
+            step += 1
+
+            if key is GOAL:
+                return {
+                    'path': self._refine(parent, start_tree, goal_tree),
+                    'cost': round(current_g, 2),
+                    'nodes_expanded': self.nodes_expanded,
+                    'trace': self.trace,
+                    'cells_touched': len(self.cells_touched),
+                    'success': True
+                }
+
+            if self.budget is not None and self.budget.exhausted(self.nodes_expanded):
+                return self.budget.limit_result(self.nodes_expanded, self.trace)
+
+            closed.add(key)
+            self.nodes_expanded += 1
+
+            for neighbor, cost, kind in self._abstract_edges(key, start_cell, start_dist,
+                                                             goal_cell_id, goal_dist):
+                if neighbor in closed:
+                    continue
+                new_g = current_g + cost
+                if neighbor not in g_values or new_g < g_values[neighbor]:
+                    g_values[neighbor] = new_g
+                    parent[neighbor] = (key, kind)
+                    h_value = 0 if neighbor is GOAL else heuristic(neighbor)
+                    counter += 1
+                    heapq.heappush(open_list, (new_g + h_value, counter, neighbor, new_g))
+
+        return {
+            'path': None,
+            'cost': float('inf'),
+            'nodes_expanded': self.nodes_expanded,
+            'trace': self.trace,
+            'cells_touched': len(self.cells_touched),
+            'success': False,
+            'error': 'No path found'
+        }
+
+    def _abstract_edges(self, key, start_cell, start_dist, goal_cell_id, goal_dist):
+        """Yield (neighbor, cost, kind) for an abstract node"""
+        if key is START:
+            for boundary in start_cell['boundary']:
+                if boundary in start_dist:
+                    yield boundary, start_dist[boundary], 'start'
+            if self.goal in start_dist:
+                yield GOAL, start_dist[self.goal], 'local'
+            return
+
+        cell_id = self.hierarchy.boundary_cell[key]
+        cell = self._cell(cell_id)
+        for neighbor, cost in cell['distances'][key].items():
+            yield neighbor, cost, 'cell'
+        for neighbor, cost in self.hierarchy.links.get(key, ()):
+            yield neighbor, cost, 'link'
+        if cell_id == goal_cell_id and key in goal_dist:
+            yield GOAL, goal_dist[key], 'goal'
+
+    def _refine(self, parent, start_tree, goal_tree):
+        """Expand the abstract corridor back into concrete nodes"""
+        with phase(self.timer, 'reconstruction'):
+            return self._refine_segments(parent, start_tree, goal_tree)
+
+    def _refine_segments(self, parent, start_tree, goal_tree):
+        segments = []
+        key = GOAL
+        while parent[key] is not None:
+            previous, kind = parent[key]
+            node = self.goal if key is GOAL else key
+            if kind == 'link':
+                segment = [node]
+            elif kind == 'cell':
+                tree = self._cell(self.hierarchy.boundary_cell[previous])['trees'][previous]
+                segment = _walk(tree, node)[::-1][1:]
+            elif kind == 'goal':
+                segment = _walk(goal_tree, previous)[1:]
+            else:  # 'start' and 'local' both walk the start tree
+                segment = _walk(start_tree, node)[::-1][1:]
+            segments.append(segment)
+            key = previous
+
+        path = [self.start]
+        for segment in reversed(segments):
+            path.extend(segment)
+        return path
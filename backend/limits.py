@@ -0,0 +1,151 @@
+"""
+Smart Courier - Search Limits
+Per-request deadlines, expansion budgets and cooperative cancellation
+"""
+
+import threading
+import time
+
+
+class SearchBudget:
+    """Limits a search loop checks before each expansion.
+
+    The expansion cap is a plain integer comparison. The clock and the
+    cancellation flag are only consulted every `CHECK_INTERVAL` units of
+    work, which keeps the per-expansion cost negligible.
+    """
+
+    CHECK_INTERVAL = 256
+
+    def __init__(self, timeout_ms=None, max_expansions=None):
+        self.timeout_ms = timeout_ms
+        self.max_expansions = max_expansions
+        self.started = time.perf_counter()
+        self.deadline = self.started + timeout_ms / 1000 if timeout_ms is not None else None
+        self.reason = None
+        self._cancelled = False
+        self._ticks = 0
+
+    def cancel(self):
+        """Ask every search using this budget to stop at its next check"""
+        self._cancelled = True
+
+    def exhausted(self, expansions, work=1):
+        """Whether a search that has expanded `expansions` nodes must stop.
+
+        `work` is how much has been done since the last call, for engines
+        that check once per batch of expansions rather than per node.
+        """
+        if self.max_expansions is not None and expansions >= self.max_expansions:
+            self.reason = 'max_expansions'
+            return True
+        self._ticks += work
+        if self._ticks < self.CHECK_INTERVAL:
+            return False
+        self._ticks = 0
+        if self._cancelled:
+            self.reason = 'cancelled'
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.reason = 'timeout'
+            return True
+        return False
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def limit(self):
+        """Which limit stopped the search, and the limits it ran under"""
+        return {
+            'reason': self.reason,
+            'timeout_ms': self.timeout_ms,
+            'max_expansions': self.max_expansions,
+            'elapsed_ms': round(self.elapsed_ms(), 3)
+        }
+
+    def limit_result(self, nodes_expanded, trace):
+        """Search result for a search stopped by this budget"""
+        return {
+            'path': None,
+            'cost': float('inf'),
+            'nodes_expanded': nodes_expanded,
+            'trace': trace,
+            'success': False,
+            'error': 'Search limit exceeded',
+            'limit': self.limit()
+        }
+
+
+class ActiveSearches:
+    """Budgets of running searches by caller-chosen id, so they can be cancelled.
+
+    Only searches running in this process can be reached; with several
+    worker processes a cancel must land on the worker running the search.
+    """
+
+    def __init__(self):
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def register(self, search_id, budget):
+        """Track `budget` under `search_id`; False if the id is already running"""
+        with self._lock:
+            if search_id in self._budgets:
+                return False
+            self._budgets[search_id] = budget
+            return True
+
+    def release(self, search_id):
+        with self._lock:
+            self._budgets.pop(search_id, None)
+
+    def cancel(self, search_id):
+        """Cancel the search running under `search_id`; False if there is none"""
+        with self._lock:
+            budget = self._budgets.get(search_id)
+        if budget is None:
+            return False
+        budget.cancel()
+        return True
+
+
+def _positive(value, name, types=(int, float)):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, types) or value <= 0:
+        raise ValueError(f"{name} must be a positive number")
+    return value
+
+
+def _cap(requested, ceiling):
+    if ceiling is None:
+        return requested
+    if requested is None:
+        return ceiling
+    return min(requested, ceiling)
+
+
+def limits_from_env(environ):
+    """Server-wide ceilings from SEARCH_TIMEOUT_MS / SEARCH_MAX_EXPANSIONS.
+
+    An empty or zero value disables that ceiling.
+    """
+    timeout = float(environ.get('SEARCH_TIMEOUT_MS', '10000') or 0)
+    expansions = int(environ.get('SEARCH_MAX_EXPANSIONS', '1000000') or 0)
+    return {
+        'timeout_ms': timeout or None,
+        'max_expansions': expansions or None
+    }
+
+
+def budget_from_request(data, defaults):
+    """Budget for a request, capped by the server-wide defaults.
+
+    Raises ValueError for malformed limits.
+    """
+    timeout_ms = _positive(data.get('timeout_ms'), 'timeout_ms')
+    max_expansions = _positive(data.get('max_expansions'), 'max_expansions', int)
+    return SearchBudget(
+        timeout_ms=_cap(timeout_ms, defaults['timeout_ms']),
+        max_expansions=_cap(max_expansions, defaults['max_expansions'])
+    )
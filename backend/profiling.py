@@ -0,0 +1,197 @@
+"""
+Smart Courier - Request Profiling
+Per-request phase timing and a sampling slow-query log
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+
+# ==================== PHASE TIMING ====================
+class PhaseTimer:
+    """Accumulate wall time per named phase.
+
+    Phases may nest; each phase reports only its own time, excluding any
+    phases nested inside it.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._began = time.perf_counter()
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - began
+            nested = self._stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def as_dict(self):
+        """Phase times in milliseconds, plus the total since creation"""
+        result = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        result['total'] = round((time.perf_counter() - self._began) * 1000, 3)
+        return result
+
+
+def phase(timer, name):
+    """Time a block under `timer`, or do nothing when profiling is off"""
+    return timer.phase(name) if timer is not None else nullcontext()
+
+
+def profiling_requested(request):
+    """Whether a request opted in via `X-Profile: 1` or `?profile=1`"""
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    return flag is not None and flag.lower() in ('1', 'true', 'yes')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(0, int(round(fraction * len(ordered))) - 1)
+    return ordered[rank]
+
+
+def search_counters(result):
+    """Expansion counters reported alongside a phase breakdown"""
+    path = result.get('path') or []
+    return {
+        'nodes_expanded': result.get('nodes_expanded', 0),
+        'trace_steps': len(result.get('trace', [])),
+        'path_length': len(path)
+    }
+
+
+# ==================== SLOW-QUERY LOG ====================
+# Only one cProfile profiler can be active per process (enforced from
+# Python 3.12), so concurrent sampled requests take turns
+_PROFILER_LOCK = threading.Lock()
+
+
+def _start_profiler():
+    """An enabled profiler, or None when another one is already running"""
+    if not _PROFILER_LOCK.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool (a debugger, an external profiler) is active
+        _PROFILER_LOCK.release()
+        return None
+    return profiler
+
+
+class SlowQueryCapture:
+    """State gathered while one request runs under the slow-query log"""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.params = None
+        self.timer = None
+        self.counters = None
+        self.elapsed_ms = 0.0
+
+
+class SlowQueryLog:
+    """Record slow or failing requests to a rotating local file.
+
+    Every request is timed; a `sample_rate` fraction also runs under cProfile
+    so that slow ones can be logged with their hottest functions. Entries are
+    written as one JSON object per line.
+    """
+
+    def __init__(self, path, threshold_ms, sample_rate=0.1,
+                 max_bytes=5 * 1024 * 1024, backup_count=3, top_functions=25):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.top_functions = top_functions
+        self.logger = logging.getLogger(f'smart_courier.slow_queries.{id(self)}')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes,
+                                           backupCount=backup_count, delay=True)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger.addHandler(self.handler)
+
+    @classmethod
+    def from_env(cls, environ):
+        """Build from SLOW_QUERY_* settings; None when no threshold is set"""
+        threshold = environ.get('SLOW_QUERY_MS')
+        if not threshold:
+            return None
+        return cls(
+            environ.get('SLOW_QUERY_LOG', 'slow_queries.log'),
+            float(threshold),
+            sample_rate=float(environ.get('SLOW_QUERY_SAMPLE_RATE', '0.1')),
+            max_bytes=int(environ.get('SLOW_QUERY_MAX_BYTES', str(5 * 1024 * 1024))),
+            backup_count=int(environ.get('SLOW_QUERY_BACKUPS', '3'))
+        )
+
+    @contextmanager
+    def capture(self):
+        """Time a request and log it if it is slow or raises"""
+        # Requests that cannot get the profiler are still timed, just unprofiled
+        profiler = _start_profiler() if random.random() < self.sample_rate else None
+        capture = SlowQueryCapture(profiler)
+        began = time.perf_counter()
+        try:
+            yield capture
+        except Exception:
+            self._finish(capture, began)
+            self._write(capture, error=traceback.format_exc())
+            raise
+        else:
+            self._finish(capture, began)
+            if capture.elapsed_ms >= self.threshold_ms:
+                self._write(capture)
+
+    def _finish(self, capture, began):
+        if capture.profiler is not None:
+            capture.profiler.disable()
+            _PROFILER_LOCK.release()
+        capture.elapsed_ms = (time.perf_counter() - began) * 1000
+
+    def _write(self, capture, error=None):
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'elapsed_ms': round(capture.elapsed_ms, 3),
+            'threshold_ms': self.threshold_ms,
+            'params': capture.params,
+            'phases': capture.timer.as_dict() if capture.timer is not None else None,
+            'counters': capture.counters,
+            'profile': self._profile_text(capture.profiler),
+            'error': error
+        }
+        self.logger.info(json.dumps(entry, default=str))
+
+    def _profile_text(self, profiler):
+        if profiler is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.top_functions)
+        return stream.getvalue()
+
+
+def capture_slow_queries(slow_queries):
+    """`slow_queries.capture()`, or a bare capture when the log is disabled"""
+    if slow_queries is None:
+        return nullcontext(SlowQueryCapture(None))
+    return slow_queries.capture()
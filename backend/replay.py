@@ -0,0 +1,157 @@
+"""
+Smart Courier - Traffic Replay
+Drives a running server with a recorded traffic log and reports latency
+
+Usage:
+    python replay.py traffic.ndjson --url http://localhost:5000 --rate 50 --concurrency 8
+    python replay.py traffic.ndjson --warm 200 --loops 3 --output report.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import percentile
+from traffic import REPLAY_HEADER, read_log, request_target
+
+
+def http_sender(base_url, timeout=30.0):
+    """Send a logged request to `base_url`; returns the status, or None on failure"""
+    base_url = base_url.rstrip('/')
+
+    def send(entry):
+        body = entry.get('body')
+        request = urllib.request.Request(
+            base_url + request_target(entry),
+            data=json.dumps(body).encode('utf-8') if body is not None else None,
+            method=entry.get('method', 'GET'),
+            headers={'Content-Type': 'application/json', REPLAY_HEADER: '1'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+        except (urllib.error.URLError, OSError):
+            return None
+
+    return send
+
+
+def summarize(samples):
+    """Error counts and latency percentiles for (status, expected, latency) samples"""
+    latencies = [latency for _, _, latency in samples]
+    errors = sum(1 for status, _, _ in samples if status is None or status >= 500)
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0,
+        'status_mismatches': sum(1 for status, expected, _ in samples
+                                 if expected is not None and status != expected),
+        'latency_ms': None
+    }
+    if latencies:
+        summary['latency_ms'] = {
+            'mean': round(statistics.mean(latencies), 3),
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p90': round(percentile(latencies, 0.90), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(max(latencies), 3)
+        }
+    return summary
+
+
+def replay(entries, send, rate=None, concurrency=1):
+    """Send `entries` at `rate` requests per second (None: as fast as possible).
+
+    Requests are scheduled on a fixed timetable, so a slow server makes
+    later requests start late instead of lowering the offered load; that
+    delay is reported as schedule lag. Latency is measured from send to
+    response.
+    """
+    samples = []
+    routes = {}
+    lags = []
+    lock = threading.Lock()
+    began = time.perf_counter()
+
+    def run(position, entry):
+        scheduled = began + position / rate if rate else began
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        try:
+            status = send(entry)
+        except Exception:
+            status = None
+        latency = (time.perf_counter() - sent) * 1000
+        sample = (status, entry.get('status'), latency)
+        with lock:
+            samples.append(sample)
+            routes.setdefault(entry['path'], []).append(sample)
+            lags.append((sent - scheduled) * 1000)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for position, entry in enumerate(entries):
+            pool.submit(run, position, entry)
+
+    duration = time.perf_counter() - began
+    report = summarize(samples)
+    report.update({
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(samples) / duration, 2) if duration > 0 else None,
+        'target_rps': rate,
+        'concurrency': concurrency,
+        'schedule_lag_ms': {
+            'p50': round(percentile(lags, 0.50), 3),
+            'p99': round(percentile(lags, 0.99), 3)
+        } if rate and lags else None,
+        'routes': {path: summarize(route_samples) for path, route_samples in sorted(routes.items())}
+    })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded traffic log against a server')
+    parser.add_argument('log', help='NDJSON traffic log written with TRAFFIC_LOG')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Requests per second (default: as fast as possible)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--limit', type=int, help='Replay only the first N logged requests')
+    parser.add_argument('--loops', type=int, default=1, help='Replay the log this many times')
+    parser.add_argument('--warm', type=int, default=0,
+                        help='Send the first N requests unmeasured before the run')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--output', help='File to write the report to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    entries = read_log(args.log, args.limit)
+    if not entries:
+        parser.error(f"no requests found in {args.log}")
+    send = http_sender(args.url, args.timeout)
+
+    for entry in entries[:args.warm]:
+        send(entry)
+    print(f"replaying {len(entries) * args.loops} requests against {args.url}", file=sys.stderr)
+
+    report = replay(entries * args.loops, send, args.rate or None, args.concurrency)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            stream.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
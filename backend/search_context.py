@@ -0,0 +1,169 @@
+"""
+Smart Courier - Reusable Search Contexts
+Preallocated, generation-stamped per-query state shared by the search engines
+"""
+
+import gc
+import threading
+import time
+from contextlib import contextmanager
+
+
+# ==================== SEARCH CONTEXT ====================
+class SearchContext:
+    """Per-query search state backed by arrays indexed by node index.
+
+    Instead of building fresh dicts and sets for every query, a context keeps
+    flat lists sized to the graph. Each slot carries the generation in which
+    it was last written, so resetting the context is a single increment.
+    """
+
+    __slots__ = ('generation', 'g', 'parent', 'seen', 'closed', 'capacity')
+
+    def __init__(self, capacity=0):
+        self.generation = 0
+        self.capacity = 0
+        self.g = []
+        self.parent = []
+        self.seen = []
+        self.closed = []
+        self.ensure_capacity(capacity)
+
+    def ensure_capacity(self, capacity):
+        """Grow the backing arrays so they can hold `capacity` nodes"""
+        extra = capacity - self.capacity
+        if extra > 0:
+            self.g.extend([0.0] * extra)
+            self.parent.extend([-1] * extra)
+            self.seen.extend([0] * extra)
+            self.closed.extend([0] * extra)
+            self.capacity = capacity
+
+    def reset(self, capacity):
+        """Start a new query in O(1) by bumping the generation stamp"""
+        self.ensure_capacity(capacity)
+        self.generation += 1
+        return self.generation
+
+    def is_seen(self, index):
+        """Whether `index` was reached during the current query"""
+        return self.seen[index] == self.generation
+
+    def is_closed(self, index):
+        """Whether `index` was expanded during the current query"""
+        return self.closed[index] == self.generation
+
+    def visit(self, index, g, parent):
+        """Record the best known cost and parent for `index`"""
+        self.g[index] = g
+        self.parent[index] = parent
+        self.seen[index] = self.generation
+
+    def close(self, index):
+        """Mark `index` as expanded"""
+        self.closed[index] = self.generation
+
+    def reconstruct_path(self, node_ids, goal_index):
+        """Walk parent pointers from the goal back to the start in O(d)"""
+        path = []
+        parent = self.parent
+        current = goal_index
+        while current != -1:
+            path.append(node_ids[current])
+            current = parent[current]
+        path.reverse()
+        return path
+
+
+# ==================== CONTEXT POOL ====================
+class SearchContextPool:
+    """Thread-safe pool of reusable search contexts.
+
+    Each worker thread leases a context for the duration of a query and hands
+    it back afterwards, so steady-state queries allocate no per-node state.
+    """
+
+    def __init__(self, max_idle=32):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, capacity):
+        """Take an idle context (or create one) reset for `capacity` nodes"""
+        with self._lock:
+            if self._idle:
+                context = self._idle.pop()
+                self.reused += 1
+            else:
+                context = None
+                self.created += 1
+        if context is None:
+            context = SearchContext(capacity)
+        context.reset(capacity)
+        return context
+
+    def release(self, context):
+        """Return a context to the pool"""
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(context)
+
+    @contextmanager
+    def lease(self, graph):
+        """Lease a context sized to `graph` for the duration of a block"""
+        context = self.acquire(len(graph.node_ids))
+        try:
+            yield context
+        finally:
+            self.release(context)
+
+    def stats(self):
+        """Pool usage counters"""
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'idle': len(self._idle)
+            }
+
+
+SEARCH_POOL = SearchContextPool()
+
+
+# ==================== GC MONITOR ====================
+class GCMonitor:
+    """Measure garbage collector pauses while a block of work runs"""
+
+    def __init__(self):
+        self.collections = 0
+        self.pause_ms = 0.0
+        self.max_pause_ms = 0.0
+        self._started = None
+
+    def _callback(self, phase, info):
+        if phase == 'start':
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            pause = (time.perf_counter() - self._started) * 1000
+            self.collections += 1
+            self.pause_ms += pause
+            self.max_pause_ms = max(self.max_pause_ms, pause)
+            self._started = None
+
+    def __enter__(self):
+        gc.callbacks.append(self._callback)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        gc.callbacks.remove(self._callback)
+        return False
+
+    def stats(self):
+        """Collected GC pause statistics"""
+        return {
+            'collections': self.collections,
+            'pause_ms': round(self.pause_ms, 3),
+            'max_pause_ms': round(self.max_pause_ms, 3)
+        }
@@ -0,0 +1,240 @@
+"""
+Smart Courier - Graph Tiles
+Viewport queries over a per-zoom spatial index with simplified low-zoom levels
+"""
+
+import hashlib
+import math
+import threading
+import weakref
+from collections import OrderedDict
+
+from hierarchy import GridPartition
+
+
+MAX_ZOOM = 24
+
+# Largest number of tiles one request may cover
+MAX_TILES = 64
+
+# Simplified levels merge nodes on a grid this many cells across each tile
+CLUSTER_RESOLUTION = 32
+
+# Clustering that keeps more than this share of nodes is not worth it
+FULL_DETAIL_RATIO = 0.75
+
+TILE_CACHE_SIZE = 1024
+
+
+def parse_bbox(value):
+    """'min_x,min_y,max_x,max_y' as a tuple of floats.
+
+    Raises ValueError for malformed boxes.
+    """
+    try:
+        box = tuple(float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be min_x,min_y,max_x,max_y') from None
+    if (len(box) != 4 or not all(math.isfinite(part) for part in box)
+            or box[0] > box[2] or box[1] > box[3]):
+        raise ValueError('bbox must be min_x,min_y,max_x,max_y')
+    return box
+
+
+def parse_zoom(value):
+    """Zoom level as an int in [0, MAX_ZOOM]; raises ValueError otherwise"""
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('zoom must be an integer') from None
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_ZOOM}")
+    return zoom
+
+
+# ==================== LEVELS OF DETAIL ====================
+class LevelOfDetail:
+    """Nodes drawn at one zoom level, bucketed by the tile they fall in.
+
+    A full-detail level draws the graph itself. A simplified level keeps one
+    representative node per clustering cell (the member nearest the cell's
+    centre of mass) and joins representatives whose members share an edge,
+    using the cheapest such edge.
+    """
+
+    def __init__(self, graph, world, zoom):
+        tile_size = world.cell_size / 2 ** zoom
+        self.zoom = zoom
+        self.tiles = GridPartition(tile_size, world.origin)
+        coordinate = graph.get_coordinate
+
+        cells = {}
+        clusters = GridPartition(tile_size / CLUSTER_RESOLUTION, world.origin)
+        for node_id in graph.node_ids:
+            cells.setdefault(clusters.cell_of(coordinate(node_id)), []).append(node_id)
+
+        self.simplified = len(cells) <= FULL_DETAIL_RATIO * len(graph.node_ids)
+        if self.simplified:
+            self.members = {}
+            representative = {}
+            for members in cells.values():
+                points = [coordinate(node_id) for node_id in members]
+                mean_x = sum(p[0] for p in points) / len(points)
+                mean_y = sum(p[1] for p in points) / len(points)
+                chosen = min(members, key=lambda node_id: (coordinate(node_id)[0] - mean_x) ** 2 +
+                                                          (coordinate(node_id)[1] - mean_y) ** 2)
+                self.members[chosen] = len(members)
+                for node_id in members:
+                    representative[node_id] = chosen
+
+            self.adjacency = {node_id: {} for node_id in self.members}
+            for from_node, neighbors in graph.edges.items():
+                a = representative[from_node]
+                for to_node, cost in neighbors.items():
+                    b = representative[to_node]
+                    if a != b and cost < self.adjacency[a].get(b, float('inf')):
+                        self.adjacency[a][b] = cost
+                        self.adjacency[b][a] = cost
+            nodes = self.members
+        else:
+            self.members = None
+            self.adjacency = graph.edges
+            nodes = graph.node_ids
+
+        self.buckets = {}
+        for node_id in nodes:
+            self.buckets.setdefault(self.tiles.cell_of(coordinate(node_id)), []).append(node_id)
+
+    def tile(self, graph, tile):
+        """Nodes and edges of one tile, with the far end of any edge leaving it"""
+        node_index = graph.node_index
+        members = self.members
+        nodes = {}
+        edges = []
+
+        def add_node(node_id):
+            x, y = graph.get_coordinate(node_id)
+            entry = {'x': x, 'y': y}
+            if members is not None:
+                entry['members'] = members[node_id]
+            nodes[node_id] = entry
+
+        inside = self.buckets.get(tile, ())
+        for node_id in inside:
+            add_node(node_id)
+        inside = set(inside)
+        for node_id in inside:
+            for neighbor, cost in self.adjacency.get(node_id, {}).items():
+                # An edge between two inside nodes is emitted from its lower end
+                if neighbor in inside and node_index[neighbor] < node_index[node_id]:
+                    continue
+                if neighbor not in nodes:
+                    add_node(neighbor)
+                # Edges point from the lower node index so tiles can be merged
+                if node_index[node_id] < node_index[neighbor]:
+                    edges.append({'from': node_id, 'to': neighbor, 'cost': cost})
+                else:
+                    edges.append({'from': neighbor, 'to': node_id, 'cost': cost})
+        return {'nodes': nodes, 'edges': edges}
+
+
+# ==================== TILE INDEX ====================
+class TileIndex:
+    """Zoom levels and tile payloads for one graph version.
+
+    Levels are built on first use and tile payloads are kept in an LRU cache;
+    both are dropped with the index when the graph changes.
+    """
+
+    def __init__(self, graph, cache_size=TILE_CACHE_SIZE):
+        self.graph = graph
+        self.graph_version = graph.version
+        # One square world tile at zoom 0, padded like GridPartition.for_graph
+        self.world = GridPartition.for_graph(graph, cell_nodes=max(1, len(graph.node_ids)))
+        self.cache_size = cache_size
+        self.levels = {}
+        self.cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def bounds(self):
+        min_x, min_y = self.world.origin
+        return [min_x, min_y, min_x + self.world.cell_size, min_y + self.world.cell_size]
+
+    def level(self, zoom):
+        with self._lock:
+            level = self.levels.get(zoom)
+            if level is None:
+                level = LevelOfDetail(self.graph, self.world, zoom)
+                self.levels[zoom] = level
+            return level
+
+    def tiles_for(self, bbox, zoom):
+        """Tile ids covering `bbox` at `zoom`, clipped to the graph's extent"""
+        last = 2 ** zoom - 1
+        grid = GridPartition(self.world.cell_size / 2 ** zoom, self.world.origin)
+        low = grid.cell_of((bbox[0], bbox[1]))
+        high = grid.cell_of((bbox[2], bbox[3]))
+        columns = range(max(low[0], 0), min(high[0], last) + 1)
+        rows = range(max(low[1], 0), min(high[1], last) + 1)
+        if len(columns) * len(rows) > MAX_TILES:
+            raise ValueError(f"bbox covers {len(columns) * len(rows)} tiles at zoom {zoom}; "
+                             f"at most {MAX_TILES} are allowed")
+        return [(column, row) for row in rows for column in columns]
+
+    def tile(self, zoom, tile):
+        key = (zoom, tile)
+        with self._lock:
+            payload = self.cache.get(key)
+            if payload is not None:
+                self.cache.move_to_end(key)
+                return payload
+        payload = self.level(zoom).tile(self.graph, tile)
+        with self._lock:
+            self.cache[key] = payload
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return payload
+
+    def query(self, bbox, zoom):
+        """Merged nodes and edges of every tile covering `bbox`.
+
+        Raises ValueError when the box covers too many tiles.
+        """
+        tiles = self.tiles_for(bbox, zoom)
+        nodes = {}
+        edges = {}
+        for tile in tiles:
+            payload = self.tile(zoom, tile)
+            nodes.update(payload['nodes'])
+            for edge in payload['edges']:
+                edges[(edge['from'], edge['to'])] = edge
+        return {
+            'success': True,
+            'version': self.graph_version,
+            'zoom': zoom,
+            'detail': 'simplified' if self.level(zoom).simplified else 'full',
+            'bounds': self.bounds,
+            'tiles': [list(tile) for tile in tiles],
+            'nodes': nodes,
+            'edges': list(edges.values())
+        }
+
+    def etag(self, bbox, zoom):
+        """Validator for a query; it only changes with the graph or the tile set"""
+        key = f"{self.graph_version}:{zoom}:{self.tiles_for(bbox, zoom)}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+_TILE_INDEX_CACHE = weakref.WeakKeyDictionary()
+_TILE_INDEX_LOCK = threading.Lock()
+
+
+def tile_index_for(graph):
+    """Tile index for `graph`, rebuilt when the graph has changed"""
+    with _TILE_INDEX_LOCK:
+        index = _TILE_INDEX_CACHE.get(graph)
+        if index is None or index.graph_version != graph.version:
+            index = TileIndex(graph)
+            _TILE_INDEX_CACHE[graph] = index
+        return index
@@ -0,0 +1,168 @@
+"""
+Smart Courier - Traffic Recording
+Opt-in NDJSON log of API requests, for replay and cache warming
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+
+RECORDED_ROUTES = ('/api/search', '/api/compare', '/api/benchmark')
+
+# Requests sent by the replay tool or the warmer carry this header and are
+# never recorded, so replaying a log does not grow it
+REPLAY_HEADER = 'X-Replay'
+
+
+class TrafficRecorder:
+    """Append one JSON line per recorded request to a rotating file.
+
+    Each entry holds what is needed to send the request again (method, path,
+    query string, JSON body) plus the status and latency the server saw.
+    """
+
+    def __init__(self, path, routes=RECORDED_ROUTES, sample_rate=1.0,
+                 max_bytes=50 * 1024 * 1024, backup_count=3):
+        self.routes = set(routes)
+        self.sample_rate = sample_rate
+        self.logger = logging.getLogger(f'smart_courier.traffic.{id(self)}')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes,
+                                           backupCount=backup_count, delay=True)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger.addHandler(self.handler)
+
+    @classmethod
+    def from_env(cls, environ):
+        """Build from TRAFFIC_* settings; None when TRAFFIC_LOG is not set"""
+        path = environ.get('TRAFFIC_LOG')
+        if not path:
+            return None
+        return cls(
+            path,
+            sample_rate=float(environ.get('TRAFFIC_SAMPLE_RATE', '1.0')),
+            max_bytes=int(environ.get('TRAFFIC_MAX_BYTES', str(50 * 1024 * 1024))),
+            backup_count=int(environ.get('TRAFFIC_BACKUPS', '3'))
+        )
+
+    def wants(self, request):
+        """Whether `request` should be timed and recorded"""
+        return (request.path in self.routes
+                and REPLAY_HEADER not in request.headers
+                and random.random() < self.sample_rate)
+
+    def record(self, request, status, elapsed_ms):
+        entry = {
+            'time': round(time.time(), 6),
+            'method': request.method,
+            'path': request.path,
+            'query': request.query_string.decode('utf-8', 'replace'),
+            'body': request.get_json(silent=True),
+            'status': status,
+            'elapsed_ms': round(elapsed_ms, 3)
+        }
+        self.logger.info(json.dumps(entry, separators=(',', ':')))
+
+
+def read_log(path, limit=None):
+    """Entries of a traffic log in file order, skipping unreadable lines"""
+    entries = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and 'path' in entry:
+                entries.append(entry)
+                if limit is not None and len(entries) >= limit:
+                    break
+    return entries
+
+
+def request_target(entry):
+    """Path plus query string of a logged request"""
+    query = entry.get('query')
+    return f"{entry['path']}?{query}" if query else entry['path']
+
+
+def warm_caches(flask_app, entries):
+    """Send logged requests through `flask_app` in-process.
+
+    This builds the lazily computed per-graph data (heuristic scales,
+    hierarchies, CSR arrays, encoded payloads, pooled search contexts) before
+    real traffic arrives.
+    """
+    client = flask_app.test_client()
+    began = time.perf_counter()
+    errors = 0
+    for entry in entries:
+        response = client.open(request_target(entry), method=entry.get('method', 'GET'),
+                               json=entry.get('body'), headers={REPLAY_HEADER: 'warm'})
+        errors += int(response.status_code >= 500)
+    return {
+        'requests': len(entries),
+        'errors': errors,
+        'elapsed_ms': round((time.perf_counter() - began) * 1000, 3)
+    }
+
+
+class CacheWarmer:
+    """Run `warm_caches` once per process, in a background thread.
+
+    Started when the app module is imported, so it runs in whichever process
+    actually serves: the dev server's reloader child, `flask run`, or each
+    gunicorn worker. Requests are served, cold, while it runs.
+    """
+
+    def __init__(self, path, limit=1000):
+        self.path = path
+        self.limit = limit
+        self.result = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, environ):
+        """Build from TRAFFIC_WARM settings; None when TRAFFIC_WARM is not set"""
+        path = environ.get('TRAFFIC_WARM')
+        if not path:
+            return None
+        return cls(path, int(environ.get('TRAFFIC_WARM_LIMIT', '1000')))
+
+    @property
+    def warming(self):
+        """True while the warming thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, flask_app):
+        """Start warming `flask_app`; False if it was already started"""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self._run, args=(flask_app,),
+                                            name='cache-warmer', daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout=None):
+        """Block until warming finishes; returns the summary, None if it failed"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.result
+
+    def _run(self, flask_app):
+        try:
+            entries = read_log(self.path, self.limit)
+        except OSError as e:
+            flask_app.logger.warning('Cache warming skipped: %s', e)
+            return
+        self.result = warm_caches(flask_app, entries)
+        flask_app.logger.info('Warmed caches with %d requests in %sms (%d errors)',
+                              self.result['requests'], self.result['elapsed_ms'],
+                              self.result['errors'])
@@ -0,0 +1,179 @@
+"""
+Smart Courier - Vectorized BFS
+Level-synchronous, direction-optimizing BFS over CSR adjacency arrays
+"""
+
+import threading
+import weakref
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the engine is only registered with it
+    np = None
+
+from profiling import phase
+
+
+HAS_NUMPY = np is not None
+
+# Only this many per-level trace rows are kept
+TRACE_LIMIT = 1000
+
+
+# ==================== CSR ADJACENCY ====================
+_CSR_CACHE = weakref.WeakKeyDictionary()
+_CSR_LOCK = threading.Lock()
+
+
+class CSRAdjacency:
+    """Neighbour lists as flat index arrays, ordered by graph.node_index.
+
+    The neighbours of node `i` are `indices[indptr[i]:indptr[i + 1]]`.
+    """
+
+    def __init__(self, graph):
+        node_index = graph.node_index
+        node_ids = graph.node_ids
+        degrees = np.fromiter((len(graph.get_neighbors(node_id)) for node_id in node_ids),
+                              dtype=np.intp, count=len(node_ids))
+        self.indptr = np.zeros(len(node_ids) + 1, dtype=np.intp)
+        np.cumsum(degrees, out=self.indptr[1:])
+        self.indices = np.fromiter(
+            (node_index[neighbor] for node_id in node_ids for neighbor in graph.get_neighbors(node_id)),
+            dtype=np.intp, count=int(self.indptr[-1]))
+        self.degrees = degrees
+        self.version = graph.version
+
+    @property
+    def node_count(self):
+        return len(self.degrees)
+
+    def gather(self, vertices):
+        """All (vertex, neighbour) pairs for `vertices` as two parallel arrays"""
+        starts = self.indptr[vertices]
+        counts = self.degrees[vertices]
+        total = int(counts.sum())
+        owners = np.repeat(vertices, counts)
+        # Position of each pair inside its owner's block, shifted to the owner's start
+        block_starts = np.cumsum(counts) - counts
+        offsets = np.repeat(starts - block_starts, counts) + np.arange(total, dtype=np.intp)
+        return owners, self.indices[offsets]
+
+
+def csr_for(graph):
+    """CSR arrays for `graph`, rebuilt when the graph has changed"""
+    with _CSR_LOCK:
+        csr = _CSR_CACHE.get(graph)
+        if csr is None or csr.version != graph.version:
+            csr = CSRAdjacency(graph)
+            _CSR_CACHE[graph] = csr
+        return csr
+
+
+# ==================== ALGORITHM: VECTORIZED BFS ====================
+class VectorBFSSearch:
+    """Breadth-first search that expands a whole frontier per NumPy step.
+
+    Top-down steps gather every neighbour of the frontier and keep the
+    unvisited ones. Bottom-up steps scan every unvisited node for a neighbour
+    in the frontier, which is cheaper once the frontier touches more edges
+    than remain unexplored. Each level picks whichever direction examines
+    fewer edges. Bottom-up relies on edges being stored in both directions,
+    as Graph.add_edge does.
+
+    Like BFSSearch the path has the fewest hops and `cost` is its weighted
+    length. The trace has one row per level rather than per node.
+    """
+
+    def __init__(self, graph, start, goal, timer=None, budget=None):
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+        self.timer = timer
+        self.budget = budget
+        self.trace = []
+        self.nodes_expanded = 0
+
+    def search(self):
+        """Execute level-synchronous BFS"""
+        graph = self.graph
+        budget = self.budget
+        with phase(self.timer, 'csr'):
+            csr = csr_for(graph)
+
+        start = graph.node_index[self.start]
+        goal = graph.node_index[self.goal]
+        visited = np.zeros(csr.node_count, dtype=bool)
+        in_frontier = np.zeros(csr.node_count, dtype=bool)
+        parent = np.full(csr.node_count, -1, dtype=np.intp)
+        visited[start] = True
+        frontier = np.array([start], dtype=np.intp)
+        visited_size = 1
+        unexplored_edges = int(csr.indptr[-1]) - int(csr.degrees[start])
+        level = 0
+
+        while frontier.size and not visited[goal]:
+            if budget is not None and budget.exhausted(self.nodes_expanded, frontier.size):
+                return budget.limit_result(self.nodes_expanded, self.trace)
+
+            frontier_edges = int(csr.degrees[frontier].sum())
+            if frontier_edges > unexplored_edges:
+                direction = 'bottom_up'
+                in_frontier[frontier] = True
+                unvisited = np.flatnonzero(~visited)
+                owners, neighbors = csr.gather(unvisited)
+                hit = in_frontier[neighbors]
+                children, first = np.unique(owners[hit], return_index=True)
+                parent[children] = neighbors[hit][first]
+                in_frontier[frontier] = False
+                edges_examined = neighbors.size
+            else:
+                direction = 'top_down'
+                owners, neighbors = csr.gather(frontier)
+                fresh = ~visited[neighbors]
+                children, first = np.unique(neighbors[fresh], return_index=True)
+                parent[children] = owners[fresh][first]
+                edges_examined = frontier_edges
+
+            visited[children] = True
+            visited_size += children.size
+            unexplored_edges -= int(csr.degrees[children].sum())
+            self.nodes_expanded += frontier.size
+            if len(self.trace) < TRACE_LIMIT:
+                self.trace.append({
+                    'step': level,
+                    'direction': direction,
+                    'frontier_size': int(frontier.size),
+                    'edges_examined': int(edges_examined),
+                    'visited_size': visited_size
+                })
+            frontier = children
+            level += 1
+
+        if not visited[goal]:
+            return {
+                'path': None,
+                'cost': float('inf'),
+                'nodes_expanded': self.nodes_expanded,
+                'trace': self.trace,
+                'success': False,
+                'error': 'No path found'
+            }
+
+        with phase(self.timer, 'reconstruction'):
+            node_ids = graph.node_ids
+            path = []
+            current = goal
+            while current != -1:
+                path.append(node_ids[current])
+                current = parent[current]
+            path.reverse()
+            cost = sum(graph.get_neighbors(a)[b] for a, b in zip(path, path[1:]))
+
+        return {
+            'path': path,
+            'cost': round(cost, 2),
+            'nodes_expanded': self.nodes_expanded,
+            'trace': self.trace,
+            'success': True
+        }
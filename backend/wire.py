@@ -0,0 +1,204 @@
+"""
+Smart Courier - Wire Formats
+Precomputed, versioned graph payloads and compact columnar encodings
+"""
+
+import gzip
+import hashlib
+import json
+import struct
+import sys
+import threading
+import weakref
+from array import array
+
+from flask import Response
+
+
+GRAPH_FORMATS = ('json', 'columnar', 'binary')
+TRACE_FORMATS = ('rows', 'columnar')
+
+BINARY_MAGIC = b'SCG1'
+
+
+# ==================== ENCODINGS ====================
+def _edge_columns(graph):
+    """Each undirected edge once, as parallel (from, to, cost) index arrays"""
+    node_index = graph.node_index
+    edge_from, edge_to, edge_cost = [], [], []
+    for from_node, neighbors in graph.edges.items():
+        from_index = node_index[from_node]
+        for to_node, cost in neighbors.items():
+            to_index = node_index[to_node]
+            if from_index <= to_index:
+                edge_from.append(from_index)
+                edge_to.append(to_index)
+                edge_cost.append(cost)
+    return edge_from, edge_to, edge_cost
+
+
+def graph_json(graph):
+    """Graph as node objects and edge objects (the original /api/graph shape)"""
+    node_ids = graph.node_ids
+    nodes = {}
+    for node_id, data in graph.nodes.items():
+        nodes[node_id] = {
+            'x': data['x'],
+            'y': data['y'],
+            'h': graph.get_heuristic(node_id)
+        }
+    edge_from, edge_to, edge_cost = _edge_columns(graph)
+    edges = [{'from': node_ids[f], 'to': node_ids[t], 'cost': c}
+             for f, t, c in zip(edge_from, edge_to, edge_cost)]
+    return {
+        'success': True,
+        'version': graph.version,
+        'nodes': nodes,
+        'edges': edges
+    }
+
+
+def graph_columnar(graph):
+    """Graph as parallel arrays; edges refer to nodes by array position"""
+    node_ids = graph.node_ids
+    coordinates = [graph.get_coordinate(node_id) for node_id in node_ids]
+    edge_from, edge_to, edge_cost = _edge_columns(graph)
+    return {
+        'success': True,
+        'version': graph.version,
+        'format': 'columnar',
+        'nodes': {
+            'id': node_ids,
+            'x': [c[0] for c in coordinates],
+            'y': [c[1] for c in coordinates],
+            'h': [graph.get_heuristic(node_id) for node_id in node_ids]
+        },
+        'edges': {
+            'from': edge_from,
+            'to': edge_to,
+            'cost': edge_cost
+        }
+    }
+
+
+def graph_binary(graph):
+    """Graph as little-endian typed arrays behind a small JSON header.
+
+    Layout: 4-byte magic, uint32 header length, UTF-8 JSON header, then each
+    array at an 8-byte aligned offset so clients can view it directly as a
+    Float64Array / Uint32Array. The header lists node ids and every array's
+    name, type, offset and length.
+    """
+    columnar = graph_columnar(graph)
+    nodes = columnar['nodes']
+    edges = columnar['edges']
+    arrays = [
+        ('x', 'd', 'float64', nodes['x']),
+        ('y', 'd', 'float64', nodes['y']),
+        ('h', 'd', 'float64', nodes['h']),
+        ('edge_from', 'I', 'uint32', edges['from']),
+        ('edge_to', 'I', 'uint32', edges['to']),
+        ('edge_cost', 'd', 'float64', edges['cost'])
+    ]
+
+    blobs = []
+    for name, code, dtype, values in arrays:
+        data = array(code, values)
+        if sys.byteorder != 'little':
+            data.byteswap()
+        blobs.append((name, dtype, len(values), data.tobytes()))
+
+    # Array offsets depend on the header length, so grow it until it settles
+    header_length = 0
+    while True:
+        offset = 8 + header_length
+        descriptors = []
+        for name, dtype, length, blob in blobs:
+            descriptors.append({'name': name, 'type': dtype, 'offset': offset, 'length': length})
+            offset = _align(offset + len(blob))
+        header = json.dumps({
+            'version': graph.version,
+            'ids': nodes['id'],
+            'arrays': descriptors
+        }, separators=(',', ':')).encode('utf-8')
+        padded = _align(8 + len(header)) - 8
+        if padded <= header_length:
+            header += b' ' * (header_length - len(header))
+            break
+        header_length = padded
+
+    body = bytearray(BINARY_MAGIC + struct.pack('<I', len(header)) + header)
+    for descriptor, (_, _, _, blob) in zip(descriptors, blobs):
+        body.extend(b'\0' * (descriptor['offset'] - len(body)))
+        body.extend(blob)
+    return bytes(body)
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def columnar_trace(trace):
+    """Turn a list of trace rows into one array per field"""
+    fields = []
+    for row in trace:
+        for key in row:
+            if key not in fields:
+                fields.append(key)
+    return {key: [row.get(key) for row in trace] for key in fields}
+
+
+# ==================== PAYLOAD CACHE ====================
+class EncodedPayload:
+    """One encoded representation with its gzip variant and ETag"""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.gzipped = gzip.compress(body, compresslevel=6)
+        self.etag = hashlib.sha1(body).hexdigest()
+
+
+class GraphPayloadCache:
+    """Encode each graph format once per graph version"""
+
+    def __init__(self):
+        self._entries = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, graph, fmt='json'):
+        with self._lock:
+            cached = self._entries.setdefault(graph, {}).get(fmt)
+            if cached is not None and cached[0] == graph.version:
+                return cached[1]
+        payload = self._encode(graph, fmt)
+        with self._lock:
+            self._entries[graph][fmt] = (graph.version, payload)
+        return payload
+
+    def _encode(self, graph, fmt):
+        if fmt == 'binary':
+            return EncodedPayload(graph_binary(graph), 'application/octet-stream')
+        data = graph_columnar(graph) if fmt == 'columnar' else graph_json(graph)
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        return EncodedPayload(body, 'application/json')
+
+
+GRAPH_PAYLOADS = GraphPayloadCache()
+
+
+def cached_response(request, payload):
+    """Serve a precomputed payload with ETag revalidation and optional gzip"""
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304)
+    else:
+        accepts_gzip = 'gzip' in request.accept_encodings
+        response = Response(payload.gzipped if accepts_gzip else payload.body,
+                            status=200, content_type=payload.content_type)
+        if accepts_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    # Weak: the gzip and identity bodies are the same representation
+    response.set_etag(payload.etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
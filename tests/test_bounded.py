@@ -0,0 +1,191 @@
+"""
+Unit tests for the memory-bounded beam A* and SMA* engines
+"""
+
+import tracemalloc
+import unittest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('../backend')
+
+import app
+import bounded
+from app import AStarSearch
+from bounded import BYTES_PER_NODE, BeamSearch, SMAStarSearch, memory_limits_from_request
+from generators import grid_graph, road_network
+from limits import SearchBudget
+
+
+def path_cost(graph, path):
+    return sum(graph.edges[a][b] for a, b in zip(path, path[1:]))
+
+
+class TestBoundedSearch(unittest.TestCase):
+    """Test bounded engines against plain A*"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build graphs and reference A* results"""
+        cls.graph = road_network(800, seed=2)
+        ids = cls.graph.node_ids
+        cls.pairs = [(ids[i], ids[-1 - i]) for i in range(0, 40, 8)]
+        cls.reference = {pair: AStarSearch(cls.graph, *pair).search() for pair in cls.pairs}
+    
+    def test_large_cap_is_optimal(self):
+        """Test that both engines match A* when the cap is never reached"""
+        for engine in (BeamSearch, SMAStarSearch):
+            for start, goal in self.pairs:
+                with self.subTest(engine=engine.__name__, start=start, goal=goal):
+                    result = engine(self.graph, start, goal, max_nodes=100000).search()
+                    expected = self.reference[(start, goal)]
+                    self.assertEqual(result['success'], expected['success'])
+                    if expected['success']:
+                        self.assertAlmostEqual(result['cost'], expected['cost'], places=2)
+                        self.assertEqual(result['memory']['forgotten_nodes'], 0)
+    
+    def test_sma_respects_cap(self):
+        """Test that SMA* never stores more nodes than allowed"""
+        for start, goal in self.pairs:
+            with self.subTest(start=start, goal=goal):
+                budget = SearchBudget(max_expansions=20000)
+                result = SMAStarSearch(self.graph, start, goal, max_nodes=120,
+                                       budget=budget).search()
+                self.assertLessEqual(result['memory']['peak_stored_nodes'], 120)
+                if result['success']:
+                    self.assertEqual(result['path'][0], start)
+                    self.assertEqual(result['path'][-1], goal)
+                    self.assertAlmostEqual(path_cost(self.graph, result['path']),
+                                           result['cost'], places=1)
+    
+    def test_beam_respects_cap(self):
+        """Test that the beam never stores more open and expanded nodes than allowed"""
+        outcomes = set()
+        for start, goal in self.pairs:
+            with self.subTest(start=start, goal=goal):
+                result = BeamSearch(self.graph, start, goal, max_nodes=600).search()
+                self.assertLessEqual(result['memory']['peak_stored_nodes'], 600)
+                outcomes.add(result['success'])
+                if result['success']:
+                    self.assertAlmostEqual(path_cost(self.graph, result['path']),
+                                           result['cost'], places=1)
+                    self.assertGreaterEqual(result['cost'],
+                                            self.reference[(start, goal)]['cost'] - 0.01)
+        self.assertEqual(outcomes, {True, False})
+    
+    def test_beam_memory_limit_covers_expanded_nodes(self):
+        """Test that a byte budget bounds everything the beam stores"""
+        graph = road_network(5000, seed=3)
+        result = BeamSearch(graph, graph.node_ids[0], graph.node_ids[-1],
+                            max_memory_bytes=100 * BYTES_PER_NODE).search()
+        self.assertLessEqual(result['memory']['peak_stored_nodes'], 100)
+        self.assertLessEqual(result['memory']['estimated_peak_bytes'], 100 * BYTES_PER_NODE)
+    
+    def test_unreachable_goal(self):
+        """Test that a walled-off goal fails cleanly under a tight cap"""
+        graph = grid_graph(6, 6, obstacle_ratio=0.0)
+        graph.add_node('island', 100, 100, 0)
+        result = BeamSearch(graph, 0, 'island', max_nodes=5).search()
+        self.assertFalse(result['success'])
+        # The depth cutoff ends SMA* once no path can fit, well before any budget
+        result = SMAStarSearch(graph, 0, 'island', max_nodes=5).search()
+        self.assertFalse(result['success'])
+        self.assertNotIn('limit', result)
+        self.assertLess(result['nodes_expanded'], 100)
+    
+    def test_sma_unreachable_with_room(self):
+        """Test that SMA* with memory to spare fails after about as much work as A*"""
+        graph = road_network(800, seed=2)
+        graph.add_node('island', 10 ** 6, 10 ** 6, 0)
+        start = graph.node_ids[0]
+        result = SMAStarSearch(graph, start, 'island').search()
+        expected = AStarSearch(graph, start, 'island').search()
+        self.assertFalse(result['success'])
+        self.assertNotIn('limit', result)
+        self.assertLessEqual(result['nodes_expanded'], expected['nodes_expanded'] + 1)
+    
+    def test_sma_expansion_backstop(self):
+        """Test that a generous caller budget is tightened to SMA_MAX_EXPANSIONS"""
+        previous = bounded.SMA_MAX_EXPANSIONS
+        bounded.SMA_MAX_EXPANSIONS = 50
+        try:
+            budget = SearchBudget(max_expansions=10 ** 6)
+            result = SMAStarSearch(self.graph, *self.pairs[0], max_nodes=60,
+                                   budget=budget).search()
+        finally:
+            bounded.SMA_MAX_EXPANSIONS = previous
+        self.assertEqual(result['limit']['reason'], 'max_expansions')
+        self.assertEqual(result['nodes_expanded'], 50)
+    
+    def test_memory_limit_sets_cap(self):
+        """Test that a byte budget is turned into a node cap"""
+        search = SMAStarSearch(self.graph, *self.pairs[0], max_memory_bytes=50 * BYTES_PER_NODE)
+        self.assertEqual(search.max_nodes, 50)
+        search = SMAStarSearch(self.graph, *self.pairs[0], max_nodes=20,
+                               max_memory_bytes=50 * BYTES_PER_NODE)
+        self.assertEqual(search.max_nodes, 20)
+    
+    def test_track_memory(self):
+        """Test that traced peak bytes are reported only on request"""
+        start, goal = self.pairs[0]
+        result = BeamSearch(self.graph, start, goal, track_memory=True).search()
+        self.assertGreater(result['memory']['peak_traced_bytes'], 0)
+        result = BeamSearch(self.graph, start, goal).search()
+        self.assertIsNone(result['memory']['peak_traced_bytes'])
+    
+    def test_concurrent_track_memory(self):
+        """Test that overlapping tracked searches do not stop each other's tracing"""
+        start, goal = self.pairs[0]
+        searches = [SMAStarSearch(self.graph, start, goal, track_memory=True) for _ in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda search: search.search(), searches))
+        for result in results:
+            self.assertGreater(result['memory']['peak_traced_bytes'], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+    
+    def test_request_parsing(self):
+        """Test parsing and validation of memory limits"""
+        self.assertEqual(memory_limits_from_request({'max_open_nodes': 64}),
+                         {'max_nodes': 64, 'max_memory_bytes': None})
+        for bad in (0, -5, 1.5, 'many', True):
+            with self.assertRaises(ValueError):
+                memory_limits_from_request({'max_open_nodes': bad})
+
+
+class TestBoundedEndpoint(unittest.TestCase):
+    """Test bounded algorithms on /api/search"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def test_sma_search(self):
+        """Test that SMA* reports the achieved memory bound"""
+        response = self.client.post('/api/search', json={
+            'start': 'A', 'goal': 'G', 'algorithm': 'sma', 'max_open_nodes': 4
+        })
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['memory']['max_nodes'], 4)
+        self.assertLessEqual(data['memory']['peak_stored_nodes'], 4)
+    
+    def test_sma_cap_below_solution_depth(self):
+        """Test that a cap too small for the solution fails fast, not at the timeout"""
+        response = self.client.post('/api/search', json={
+            'start': 'A', 'goal': 'G', 'algorithm': 'sma', 'max_open_nodes': 3
+        })
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(data['success'])
+        self.assertNotIn('limit', data)
+        self.assertLess(data['nodes_expanded'], 100)
+    
+    def test_invalid_memory_limit(self):
+        """Test that malformed memory limits are rejected"""
+        response = self.client.post('/api/search', json={
+            'algorithm': 'beam', 'max_memory_bytes': 'lots'
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
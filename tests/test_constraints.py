@@ -0,0 +1,120 @@
+"""
+Unit tests for per-request route constraints
+"""
+
+import copy
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+from app import AStarSearch, BFSSearch
+from constraints import ConstrainedGraph, constraints_from_request
+from generators import grid_graph
+
+
+class TestConstrainedGraph(unittest.TestCase):
+    """Test the overlay against an edited copy of the graph"""
+    
+    def setUp(self):
+        """Build an open 10x10 grid"""
+        self.graph = grid_graph(10, 10, obstacle_ratio=0.0)
+        self.edges_before = copy.deepcopy(self.graph.edges)
+    
+    def test_matches_edited_copy(self):
+        """Test that searching the view equals searching a mutated copy"""
+        avoid_nodes = [44, 45, 54, 55]
+        avoid_edges = [(0, 1), (10, 20)]
+        multipliers = [(11, 12, 4.0)]
+        view = ConstrainedGraph(self.graph, avoid_nodes, avoid_edges, multipliers)
+    
+        edited = copy.deepcopy(self.graph)
+        for node_id in avoid_nodes:
+            for neighbor in list(edited.edges[node_id]):
+                del edited.edges[node_id][neighbor]
+                del edited.edges[neighbor][node_id]
+        for a, b in avoid_edges:
+            del edited.edges[a][b]
+            del edited.edges[b][a]
+        edited.edges[11][12] *= 4.0
+        edited.edges[12][11] *= 4.0
+    
+        for start, goal in ((0, 99), (34, 66), (11, 13)):
+            with self.subTest(start=start, goal=goal):
+                result = AStarSearch(view, start, goal).search()
+                expected = AStarSearch(edited, start, goal).search()
+                self.assertAlmostEqual(result['cost'], expected['cost'], places=2)
+                self.assertFalse(set(result['path']) & set(avoid_nodes))
+        self.assertEqual(self.graph.edges, self.edges_before)
+    
+    def test_untouched_nodes_share_neighbors(self):
+        """Test that unconstrained lookups return the shared dicts"""
+        view = ConstrainedGraph(self.graph, [55])
+        self.assertIs(view.get_neighbors(0), self.graph.get_neighbors(0))
+        self.assertNotIn(55, view.get_neighbors(54))
+        self.assertEqual(view.get_neighbors(55), {})
+        self.assertIs(view.node_index, self.graph.node_index)
+    
+    def test_closure_disconnects(self):
+        """Test that closing every way in makes the goal unreachable"""
+        view = ConstrainedGraph(self.graph, avoid_edges=[(99, 98), (99, 89)])
+        self.assertFalse(BFSSearch(view, 0, 99).search()['success'])
+        self.assertTrue(BFSSearch(self.graph, 0, 99).search()['success'])
+    
+    def test_request_parsing(self):
+        """Test parsing and validation of constraint lists"""
+        self.assertIsNone(constraints_from_request(self.graph, {}))
+        view = constraints_from_request(self.graph, {
+            'avoid_nodes': [5],
+            'avoid_edges': [{'from': 0, 'to': 1}],
+            'cost_multipliers': [[2, 3, 1.5]]
+        })
+        self.assertEqual(view.avoid_nodes, {5})
+        self.assertNotIn(1, view.get_neighbors(0))
+        self.assertAlmostEqual(view.get_neighbors(3)[2], self.graph.edges[3][2] * 1.5)
+        for bad in ({'avoid_nodes': ['nowhere']},
+                    {'avoid_nodes': 5},
+                    {'avoid_edges': [[0, 55]]},
+                    {'avoid_edges': [[0]]},
+                    {'cost_multipliers': [[0, 1, 0.5]]},
+                    {'cost_multipliers': [[0, 1, 'x']]},
+                    {'cost_multipliers': [[0, 1, float('inf')]]},
+                    {'cost_multipliers': [[0, 1, float('nan')]]}):
+            with self.subTest(data=bad):
+                with self.assertRaises(ValueError):
+                    constraints_from_request(self.graph, bad)
+
+
+class TestConstraintsEndpoint(unittest.TestCase):
+    """Test constraints on /api/search"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def search(self, **data):
+        return self.client.post('/api/search', json={'start': 'A', 'goal': 'G', **data})
+    
+    def test_avoid_node(self):
+        """Test that an avoided node is routed around"""
+        plain = self.search().get_json()
+        avoided = plain['path'][1]
+        data = self.search(avoid_nodes=[avoided]).get_json()
+        self.assertNotIn(avoided, data['path'] or [])
+        self.assertTrue(data['success'])
+        # The shared graph is left untouched
+        self.assertIn(avoided, app.GRAPH.get_neighbors(plain['path'][0]))
+    
+    def test_precomputed_engine_rejected(self):
+        """Test that engines with precomputed tables refuse constraints"""
+        response = self.search(algorithm='hpa', avoid_nodes=['B'])
+        self.assertEqual(response.status_code, 400)
+    
+    def test_avoided_endpoint_rejected(self):
+        """Test that the start or goal cannot be avoided"""
+        response = self.search(avoid_nodes=['G'])
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,165 @@
+"""
+Unit tests for multi-source courier dispatch
+"""
+
+import random
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+from app import AStarSearch
+from dispatch import assign_parcels, nearest_courier
+from generators import road_network
+from heuristics import resolve_heuristic
+from limits import SearchBudget
+
+
+class TestNearestCourier(unittest.TestCase):
+    """Test single-parcel dispatch against one search per courier"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build a road network with a random fleet"""
+        cls.graph = road_network(900, seed=8)
+        rng = random.Random(3)
+        node_ids = list(cls.graph.nodes)
+        cls.couriers = [(f'c{i}', rng.choice(node_ids)) for i in range(40)]
+        cls.parcels = [(f'p{i}', rng.choice(node_ids)) for i in range(15)]
+    
+    def brute_force(self, parcel):
+        """Cheapest courier cost from one A* per courier"""
+        costs = []
+        for _, node in self.couriers:
+            result = AStarSearch(self.graph, node, parcel,
+                                 heuristic=resolve_heuristic(self.graph, parcel)).search()
+            if result['success']:
+                costs.append(result['cost'])
+        return min(costs) if costs else None
+    
+    def test_matches_per_courier_search(self):
+        """Test that the multi-source search finds the cheapest courier"""
+        for _, parcel in self.parcels:
+            with self.subTest(parcel=parcel):
+                result = nearest_courier(self.graph, parcel, self.couriers)
+                expected = self.brute_force(parcel)
+                if expected is None:
+                    self.assertFalse(result['success'])
+                    continue
+                self.assertAlmostEqual(result['cost'], expected, places=1)
+                self.assertEqual(result['path'][0], result['courier_node'])
+                self.assertEqual(result['path'][-1], parcel)
+                self.assertIn((result['courier'], result['courier_node']), self.couriers)
+    
+    def test_unlimited_batch_matches_nearest(self):
+        """Test that without capacity limits every parcel gets its nearest courier"""
+        result = assign_parcels(self.graph, self.parcels, self.couriers)
+        self.assertEqual(result['rounds'], 1)
+        for assignment in result['assignments']:
+            nearest = nearest_courier(self.graph, assignment['parcel_node'], self.couriers)
+            self.assertAlmostEqual(assignment['cost'], nearest['cost'], places=1)
+    
+    def test_budget_returns_partial_assignments(self):
+        """Test that a batch stopped by its budget keeps the assignments made so far"""
+        full = assign_parcels(self.graph, self.parcels, self.couriers, capacity=1)
+        budget = SearchBudget(max_expansions=full['nodes_expanded'] // 2)
+        result = assign_parcels(self.graph, self.parcels, self.couriers, capacity=1,
+                                budget=budget)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['limit']['reason'], 'max_expansions')
+        self.assertLessEqual(result['nodes_expanded'], budget.max_expansions)
+        self.assertEqual(len(result['assignments']) + len(result['unassigned']), len(self.parcels))
+        self.assertEqual(result['assignments'], full['assignments'][:len(result['assignments'])])
+    
+    def test_capacity_respected(self):
+        """Test that no courier takes more parcels than its capacity"""
+        couriers = self.couriers[:5]
+        result = assign_parcels(self.graph, self.parcels, couriers, capacity=2)
+        loads = {}
+        for assignment in result['assignments']:
+            loads[assignment['courier']] = loads.get(assignment['courier'], 0) + 1
+        self.assertLessEqual(max(loads.values()), 2)
+        self.assertEqual(len(result['assignments']) + len(result['unassigned']), len(self.parcels))
+
+
+class TestDispatchEndpoint(unittest.TestCase):
+    """Test /api/dispatch"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def test_single_parcel(self):
+        """Test nearest-courier lookup on the demo graph"""
+        response = self.client.post('/api/dispatch', json={
+            'parcel': 'G',
+            'couriers': [{'id': 'c1', 'node': 'A'}, {'id': 'c2', 'node': 'H'}]
+        })
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['courier'], 'c2')
+        self.assertEqual(data['path'], ['H', 'D', 'G'])
+    
+    def test_batch(self):
+        """Test batched assignment with plain node ids"""
+        response = self.client.post('/api/dispatch', json={
+            'parcels': ['G', 'C'], 'couriers': ['A', 'F'], 'capacity': 1
+        })
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual({a['courier'] for a in data['assignments']}, {'A', 'F'})
+    
+    def test_duplicate_parcel_ids(self):
+        """Test that parcels sharing an id are each assigned or reported"""
+        response = self.client.post('/api/dispatch', json={
+            'parcels': ['G', 'G'], 'couriers': ['A', 'F'], 'capacity': 1
+        })
+        data = response.get_json()
+        self.assertEqual(len(data['assignments']), 2)
+        self.assertEqual(data['unassigned'], [])
+        
+        response = self.client.post('/api/dispatch', json={
+            'parcels': ['G', 'G'], 'couriers': ['A'], 'capacity': 1
+        })
+        data = response.get_json()
+        self.assertFalse(data['success'])
+        self.assertEqual(data['unassigned'], ['G'])
+    
+    def test_duplicate_courier_ids(self):
+        """Test that couriers sharing an id each get their own capacity"""
+        response = self.client.post('/api/dispatch', json={
+            'parcels': ['G', 'C'], 'couriers': ['A', 'A'], 'capacity': 1
+        })
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['assignments']), 2)
+        self.assertEqual(data['unassigned'], [])
+    
+    def test_malformed_locations(self):
+        """Test that couriers and parcels must be lists of ids or objects"""
+        for body in ({'parcel': 'G', 'couriers': 'AF'},
+                     {'parcel': 'G', 'couriers': [['A']]},
+                     {'parcel': 'G', 'couriers': [{'id': 'c1', 'node': ['A']}]},
+                     {'parcels': 'G', 'couriers': ['A']},
+                     {'parcel': 7, 'couriers': ['A']}):
+            with self.subTest(body=body):
+                response = self.client.post('/api/dispatch', json=body)
+                self.assertEqual(response.status_code, 400)
+    
+    def test_limit(self):
+        """Test that dispatch searches honour max_expansions"""
+        response = self.client.post('/api/dispatch', json={
+            'parcel': 'G', 'couriers': ['A'], 'max_expansions': 1
+        })
+        data = response.get_json()
+        self.assertFalse(data['success'])
+        self.assertEqual(data['limit']['reason'], 'max_expansions')
+    
+    def test_invalid_node(self):
+        """Test that unknown nodes are rejected"""
+        response = self.client.post('/api/dispatch', json={'parcel': 'Z', 'couriers': ['A']})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
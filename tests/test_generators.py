@@ -0,0 +1,75 @@
+"""
+Unit tests for synthetic graph generators and the benchmark runner
+"""
+
+import unittest
+import sys
+sys.path.append('../backend')
+
+from app import AStarSearch
+from benchmark import run_benchmark
+from generators import generate, grid_graph, random_geometric_graph, road_network
+
+
+class TestGenerators(unittest.TestCase):
+    """Test generator shape and reproducibility"""
+    
+    def test_same_seed_same_graph(self):
+        """Test that a seed fully determines the generated graph"""
+        for kind in ('grid', 'geometric', 'road'):
+            with self.subTest(kind=kind):
+                first = generate(kind, 400, seed=7)
+                second = generate(kind, 400, seed=7)
+                self.assertEqual(first.coordinates, second.coordinates)
+                self.assertEqual(first.edges, second.edges)
+    
+    def test_grid_skips_obstacles(self):
+        """Test that blocked cells have no node and no edges"""
+        graph = grid_graph(20, 20, obstacle_ratio=0.3, seed=1)
+        self.assertLess(len(graph.nodes), 400)
+        for node_id, neighbors in graph.edges.items():
+            self.assertIn(node_id, graph.nodes)
+            for neighbor in neighbors:
+                self.assertIn(neighbor, graph.nodes)
+    
+    def test_geometric_edge_costs_are_distances(self):
+        """Test that geometric edges cost their Euclidean length"""
+        import math
+        
+        graph = random_geometric_graph(300, seed=3)
+        for node_id, neighbors in graph.edges.items():
+            x, y = graph.get_coordinate(node_id)
+            for neighbor, cost in neighbors.items():
+                nx, ny = graph.get_coordinate(neighbor)
+                self.assertAlmostEqual(cost, math.hypot(nx - x, ny - y))
+    
+    def test_road_network_searchable(self):
+        """Test that engines run on generated graphs"""
+        graph = road_network(400, seed=5)
+        result = AStarSearch(graph, 0, 399).search()
+        if result['success']:
+            self.assertEqual(result['path'][0], 0)
+            self.assertEqual(result['path'][-1], 399)
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+    """Test benchmark result records"""
+    
+    def test_records_per_engine(self):
+        """Test one record per kind, size and algorithm"""
+        results = run_benchmark(['grid'], [100], ['astar', 'bfs'], queries=3, seed=1)
+        self.assertEqual([r['algorithm'] for r in results], ['astar', 'bfs'])
+        for record in results:
+            self.assertEqual(record['queries'], 3)
+            self.assertIn('median_ms', record)
+            self.assertIn('gc_pause_ms', record)
+            self.assertIsNotNone(record['warmup_ms'])
+    
+    def test_warmup_excluded_from_timings(self):
+        """Test that one-off hierarchy builds are reported apart from query latency"""
+        record = run_benchmark(['road'], [1000], ['hpa'], queries=10, seed=1)[0]
+        self.assertGreater(record['warmup_ms'], record['p95_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+"""
+Unit tests for coordinate-derived heuristic providers
+"""
+
+import unittest
+import sys
+sys.path.append('../backend')
+
+from app import AStarSearch, load_graph
+from generators import road_network
+from heuristics import (CoordinateHeuristic, TableHeuristic, admissible_scale,
+                        haversine, resolve_heuristic)
+
+
+class TestCoordinateHeuristic(unittest.TestCase):
+    """Test admissibility and goal awareness"""
+    
+    def setUp(self):
+        """Set up test graph"""
+        self.graph = load_graph()
+    
+    def optimal_cost(self, graph, start, goal):
+        """Reference cost from A* with h(n) = 0 (Dijkstra)"""
+        zero = CoordinateHeuristic(graph, goal)
+        zero.scale = 0.0
+        return AStarSearch(graph, start, goal, heuristic=zero).search()['cost']
+    
+    def test_goal_heuristic_zero(self):
+        """Test that every metric is zero at its own goal"""
+        for metric in ('euclidean', 'manhattan', 'octile', 'haversine'):
+            with self.subTest(metric=metric):
+                heuristic = CoordinateHeuristic(self.graph, 'D', metric)
+                self.assertEqual(heuristic('D'), 0)
+    
+    def test_heuristic_admissible(self):
+        """Test that h(n) never exceeds the true cost to the goal"""
+        for metric in ('euclidean', 'manhattan', 'octile'):
+            heuristic = CoordinateHeuristic(self.graph, 'D', metric)
+            for node_id in self.graph.nodes:
+                with self.subTest(metric=metric, node=node_id):
+                    self.assertLessEqual(heuristic(node_id),
+                                         self.optimal_cost(self.graph, node_id, 'D') + 1e-9)
+    
+    def test_scale_below_cost_per_distance(self):
+        """Test that the scale is the minimum edge cost per unit length"""
+        scale = admissible_scale(self.graph)
+        self.assertLess(scale, 1.0)
+        self.assertGreater(scale, 0.9)
+    
+    def test_scale_tracks_graph_changes(self):
+        """Test that the cached scale is recomputed after edits"""
+        before = admissible_scale(self.graph)
+        self.graph.add_edge('A', 'G', 1.0)
+        self.assertLess(admissible_scale(self.graph), before)
+    
+    def test_batch_matches_scalar(self):
+        """Test that vectorized and scalar evaluation agree"""
+        graph = road_network(400, seed=2)
+        heuristic = CoordinateHeuristic(graph, 399)
+        indices = list(range(len(graph.node_ids)))
+        for expected, value in zip((heuristic(graph.node_ids[i]) for i in indices),
+                                   heuristic.batch(indices)):
+            self.assertAlmostEqual(expected, value)
+    
+    def test_astar_optimal_for_other_goal(self):
+        """Test that A* stays optimal for goals the table was not built for"""
+        heuristic = resolve_heuristic(self.graph, 'D')
+        self.assertEqual(heuristic.name, 'euclidean')
+        result = AStarSearch(self.graph, 'C', 'D', heuristic=heuristic).search()
+        self.assertEqual(result['cost'], self.optimal_cost(self.graph, 'C', 'D'))
+    
+    def test_auto_keeps_table_for_its_goal(self):
+        """Test that the stored table is used for the goal it was built for"""
+        self.assertIsInstance(resolve_heuristic(self.graph, 'G'), TableHeuristic)
+    
+    def test_unknown_metric(self):
+        """Test that unknown heuristics are rejected"""
+        with self.assertRaises(ValueError):
+            resolve_heuristic(self.graph, 'G', 'chebyshev')
+    
+    def test_haversine_distance(self):
+        """Test great-circle distance for one degree of latitude"""
+        self.assertAlmostEqual(haversine((0, 0), (0, 1)), 111.195, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+"""
+Unit tests for hierarchical path-finding
+"""
+
+import random
+import tempfile
+import unittest
+import sys
+sys.path.append('../backend')
+
+from app import AStarSearch, load_graph
+from generators import road_network
+from heuristics import resolve_heuristic
+from hierarchy import DiskCellStore, GridPartition, Hierarchy, HPASearch, hierarchy_for
+
+
+class TestHPASearch(unittest.TestCase):
+    """Test HPA* against flat A*"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build one partitioned graph for all tests"""
+        cls.graph = road_network(1600, seed=4)
+        cls.hierarchy = Hierarchy.build(cls.graph, GridPartition.for_graph(cls.graph, 100))
+    
+    def test_partition_has_many_cells(self):
+        """Test that the graph is split into several cells"""
+        self.assertGreater(len(self.hierarchy.store.cell_ids()), 4)
+    
+    def test_matches_astar_cost(self):
+        """Test that HPA* returns optimal, connected paths"""
+        rng = random.Random(0)
+        node_ids = list(self.graph.nodes)
+        for _ in range(20):
+            start, goal = rng.choice(node_ids), rng.choice(node_ids)
+            with self.subTest(start=start, goal=goal):
+                flat = AStarSearch(self.graph, start, goal,
+                                   heuristic=resolve_heuristic(self.graph, goal)).search()
+                result = HPASearch(self.graph, start, goal, hierarchy=self.hierarchy).search()
+                self.assertEqual(result['success'], flat['success'])
+                if not flat['success']:
+                    continue
+                self.assertAlmostEqual(result['cost'], flat['cost'], places=1)
+                path = result['path']
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                for i in range(len(path) - 1):
+                    self.assertIn(path[i + 1], self.graph.get_neighbors(path[i]))
+    
+    def test_cells_loaded_lazily(self):
+        """Test that a saved hierarchy only pages in the cells a query touches"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.hierarchy.save(directory)
+            loaded = Hierarchy.load(directory)
+            self.assertEqual(loaded.store.loads, 0)
+            
+            result = HPASearch(self.graph, 0, 1, hierarchy=loaded).search()
+            self.assertTrue(result['success'])
+            self.assertEqual(loaded.store.loads, result['cells_touched'])
+            self.assertLess(loaded.store.loads, len(loaded.store.cell_ids()))
+    
+    def test_hierarchy_for_uses_saved_directory(self):
+        """Test that a saved hierarchy is paged in for the graph it was built from"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.hierarchy.save(directory)
+            graph = road_network(1600, seed=4)
+            hierarchy = hierarchy_for(graph, directory, build_limit=100)
+            self.assertIsInstance(hierarchy.store, DiskCellStore)
+            self.assertIs(hierarchy_for(graph, directory, build_limit=100), hierarchy)
+            
+            # A different graph does not match the saved files and is too large to build
+            other = road_network(1600, seed=5)
+            with self.assertRaises(ValueError):
+                hierarchy_for(other, directory, build_limit=100)
+            self.assertIsNotNone(hierarchy_for(road_network(50, seed=5), directory, build_limit=100))
+    
+    def test_single_cell_graph(self):
+        """Test the demo graph, which fits in one cell"""
+        graph = load_graph()
+        result = HPASearch(graph, 'A', 'G').search()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['cost'], AStarSearch(graph, 'A', 'G').search()['cost'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
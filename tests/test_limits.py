@@ -0,0 +1,118 @@
+"""
+Unit tests for search deadlines, expansion budgets and cancellation
+"""
+
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+from app import AStarSearch, BFSSearch, DFSSearch
+from generators import grid_graph
+from limits import ActiveSearches, SearchBudget, budget_from_request
+
+
+class TestSearchBudget(unittest.TestCase):
+    """Test budget checks inside the engines"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build a graph large enough to need limiting"""
+        cls.graph = grid_graph(60, 60, obstacle_ratio=0.0)
+    
+    def test_max_expansions(self):
+        """Test that every engine stops at the expansion cap"""
+        for engine in (AStarSearch, BFSSearch, DFSSearch):
+            with self.subTest(engine=engine.__name__):
+                budget = SearchBudget(max_expansions=50)
+                result = engine(self.graph, 0, 3599, budget=budget).search()
+                self.assertFalse(result['success'])
+                self.assertEqual(result['nodes_expanded'], 50)
+                self.assertEqual(result['limit']['reason'], 'max_expansions')
+                self.assertGreater(len(result['trace']), 0)
+    
+    def test_timeout(self):
+        """Test that an expired deadline stops the search"""
+        budget = SearchBudget(timeout_ms=1e-6)
+        result = BFSSearch(self.graph, 0, 3599, budget=budget).search()
+        self.assertFalse(result['success'])
+        self.assertEqual(result['limit']['reason'], 'timeout')
+    
+    def test_cancel(self):
+        """Test cooperative cancellation"""
+        budget = SearchBudget()
+        budget.cancel()
+        result = AStarSearch(self.graph, 0, 3599, budget=budget).search()
+        self.assertEqual(result['limit']['reason'], 'cancelled')
+        self.assertLessEqual(result['nodes_expanded'], SearchBudget.CHECK_INTERVAL)
+    
+    def test_cancel_by_search_id(self):
+        """Test that a registered search can be cancelled by its id"""
+        searches = ActiveSearches()
+        budget = SearchBudget()
+        self.assertTrue(searches.register('route-1', budget))
+        self.assertFalse(searches.register('route-1', SearchBudget()))
+        self.assertTrue(searches.cancel('route-1'))
+        result = BFSSearch(self.graph, 0, 3599, budget=budget).search()
+        self.assertEqual(result['limit']['reason'], 'cancelled')
+        searches.release('route-1')
+        self.assertFalse(searches.cancel('route-1'))
+    
+    def test_generous_budget_still_succeeds(self):
+        """Test that limits do not change results when not reached"""
+        budget = SearchBudget(timeout_ms=60000, max_expansions=10 ** 6)
+        limited = AStarSearch(self.graph, 0, 3599, budget=budget).search()
+        unlimited = AStarSearch(self.graph, 0, 3599).search()
+        self.assertEqual(limited['cost'], unlimited['cost'])
+    
+    def test_deep_dfs_within_server_limits(self):
+        """Test that DFS paths deeper than the recursion limit still complete"""
+        budget = SearchBudget(**app.SEARCH_LIMITS)
+        result = DFSSearch(self.graph, 0, 3599, budget=budget).search()
+        self.assertTrue(result['success'])
+        self.assertGreater(len(result['path']), sys.getrecursionlimit())
+    
+    def test_request_capped_by_server(self):
+        """Test that requests cannot raise limits above the server ceiling"""
+        defaults = {'timeout_ms': 1000, 'max_expansions': 100}
+        budget = budget_from_request({'timeout_ms': 5000, 'max_expansions': 10}, defaults)
+        self.assertEqual(budget.timeout_ms, 1000)
+        self.assertEqual(budget.max_expansions, 10)
+        with self.assertRaises(ValueError):
+            budget_from_request({'max_expansions': -1}, defaults)
+
+
+class TestLimitsEndpoint(unittest.TestCase):
+    """Test limits on /api/search"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def test_partial_statistics(self):
+        """Test that a limited search reports partial statistics"""
+        response = self.client.post('/api/search', json={
+            'start': 'A', 'goal': 'G', 'algorithm': 'bfs', 'max_expansions': 2
+        })
+        data = response.get_json()
+        self.assertFalse(data['success'])
+        self.assertEqual(data['nodes_expanded'], 2)
+        self.assertEqual(data['limit']['reason'], 'max_expansions')
+    
+    def test_search_id_released(self):
+        """Test that a finished search frees its id and can no longer be cancelled"""
+        for _ in range(2):
+            response = self.client.post('/api/search', json={'start': 'A', 'goal': 'G',
+                                                             'search_id': 'route-1'})
+            self.assertTrue(response.get_json()['success'])
+        response = self.client.post('/api/search/cancel', json={'search_id': 'route-1'})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_invalid_limit(self):
+        """Test that malformed limits are rejected"""
+        response = self.client.post('/api/search', json={'timeout_ms': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,131 @@
+"""
+Unit tests for request profiling and the slow-query log
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+import profiling
+from profiling import PhaseTimer, SlowQueryLog
+
+
+class TestPhaseTimer(unittest.TestCase):
+    """Test phase accounting"""
+    
+    def test_nested_phases_are_exclusive(self):
+        """Test that a nested phase is not double counted in its parent"""
+        timer = PhaseTimer()
+        with timer.phase('outer'):
+            with timer.phase('inner'):
+                time.sleep(0.02)
+        phases = timer.as_dict()
+        self.assertGreaterEqual(phases['inner'], 15)
+        self.assertLess(phases['outer'], 15)
+
+
+class TestSearchProfiling(unittest.TestCase):
+    """Test the opt-in profile block on /api/search"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def test_profile_absent_by_default(self):
+        """Test that responses are unchanged without the flag"""
+        response = self.client.post('/api/search', json={'start': 'A', 'goal': 'G'})
+        self.assertNotIn('profile', response.get_json())
+    
+    def test_profile_header(self):
+        """Test phase breakdown and counters via X-Profile"""
+        response = self.client.post('/api/search', json={'start': 'A', 'goal': 'G'},
+                                    headers={'X-Profile': '1'})
+        profile = response.get_json()['profile']
+        for name in ('validation', 'search', 'reconstruction', 'serialization', 'total'):
+            self.assertIn(name, profile['phases'])
+        self.assertEqual(profile['counters']['nodes_expanded'],
+                         response.get_json()['nodes_expanded'])
+    
+    def test_profile_query_flag(self):
+        """Test the ?profile=1 query flag"""
+        response = self.client.post('/api/search?profile=1', json={'start': 'A', 'goal': 'D'})
+        self.assertIn('profile', response.get_json())
+    
+    def test_profiled_body_matches_plain(self):
+        """Test that the profiled body is the plain result plus the profile"""
+        plain = self.client.post('/api/search', json={'start': 'A', 'goal': 'G'})
+        profiled = self.client.post('/api/search?profile=1', json={'start': 'A', 'goal': 'G'})
+        self.assertEqual(profiled.mimetype, 'application/json')
+        data = profiled.get_json()
+        del data['profile']
+        self.assertEqual(data, plain.get_json())
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    """Test slow-query capture"""
+    
+    def setUp(self):
+        """Point the app at a temporary slow-query log"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'slow.log')
+        self.previous = app.SLOW_QUERIES
+        self.client = app.app.test_client()
+    
+    def tearDown(self):
+        """Restore the app's slow-query log"""
+        app.SLOW_QUERIES.handler.close()
+        app.SLOW_QUERIES = self.previous
+        self.directory.cleanup()
+    
+    def entries(self):
+        app.SLOW_QUERIES.handler.flush()
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as handle:
+            return [json.loads(line) for line in handle]
+    
+    def test_records_slow_queries_with_profile(self):
+        """Test that queries over the threshold are logged with cProfile stats"""
+        app.SLOW_QUERIES = SlowQueryLog(self.path, threshold_ms=0, sample_rate=1.0)
+        self.client.post('/api/search', json={'start': 'A', 'goal': 'G', 'algorithm': 'bfs'})
+        entries = self.entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['params']['algorithm'], 'bfs')
+        self.assertIn('search', entries[0]['phases'])
+        self.assertIn('function calls', entries[0]['profile'])
+    
+    def test_profiler_busy(self):
+        """Test that a request runs unprofiled while another holds the profiler"""
+        app.SLOW_QUERIES = SlowQueryLog(self.path, threshold_ms=0, sample_rate=1.0)
+        with profiling._PROFILER_LOCK:
+            response = self.client.post('/api/search', json={'start': 'A', 'goal': 'G'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(self.entries()[0]['profile'])
+        # The profiler is handed back once a sampled request finishes
+        self.client.post('/api/search', json={'start': 'A', 'goal': 'G'})
+        self.assertIn('function calls', self.entries()[1]['profile'])
+    
+    def test_skips_fast_queries(self):
+        """Test that queries under the threshold are not logged"""
+        app.SLOW_QUERIES = SlowQueryLog(self.path, threshold_ms=60000, sample_rate=1.0)
+        self.client.post('/api/search', json={'start': 'A', 'goal': 'G'})
+        self.assertEqual(self.entries(), [])
+    
+    def test_records_failures(self):
+        """Test that requests raising an exception are logged with a traceback"""
+        app.SLOW_QUERIES = SlowQueryLog(self.path, threshold_ms=60000, sample_rate=0.0)
+        response = self.client.post('/api/search', data='null', content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        entries = self.entries()
+        self.assertEqual(len(entries), 1)
+        self.assertIn('Traceback', entries[0]['error'])
+        self.assertIsNone(entries[0]['profile'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+"""
+Unit tests for pooled search contexts
+"""
+
+import unittest
+import sys
+sys.path.append('../backend')
+
+from app import AStarSearch, BFSSearch, DFSSearch, load_graph
+from search_context import SearchContext, SearchContextPool, GCMonitor
+
+
+class TestSearchContext(unittest.TestCase):
+    """Test generation-stamped context state"""
+    
+    def test_reset_clears_state(self):
+        """Test that bumping the generation forgets previous visits"""
+        context = SearchContext(4)
+        context.reset(4)
+        context.visit(2, 1.5, 0)
+        context.close(2)
+        self.assertTrue(context.is_seen(2))
+        self.assertTrue(context.is_closed(2))
+        
+        context.reset(4)
+        self.assertFalse(context.is_seen(2))
+        self.assertFalse(context.is_closed(2))
+    
+    def test_reset_grows_capacity(self):
+        """Test that contexts grow to fit larger graphs"""
+        context = SearchContext(2)
+        context.reset(10)
+        self.assertEqual(context.capacity, 10)
+        self.assertEqual(len(context.g), 10)
+    
+    def test_reconstruct_path(self):
+        """Test path reconstruction through parent pointers"""
+        context = SearchContext(3)
+        context.reset(3)
+        context.visit(0, 0, -1)
+        context.visit(1, 1, 0)
+        context.visit(2, 2, 1)
+        self.assertEqual(context.reconstruct_path(['A', 'B', 'C'], 2), ['A', 'B', 'C'])
+
+
+class TestSearchContextPool(unittest.TestCase):
+    """Test context pooling and engine integration"""
+    
+    def setUp(self):
+        """Set up test graph"""
+        self.graph = load_graph()
+    
+    def test_pool_reuses_contexts(self):
+        """Test that released contexts are handed out again"""
+        pool = SearchContextPool()
+        with pool.lease(self.graph) as first:
+            pass
+        with pool.lease(self.graph) as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['reused'], 1)
+    
+    def test_engines_with_shared_context(self):
+        """Test that a reused context gives the same results as a fresh one"""
+        context = SearchContext()
+        for engine in (AStarSearch, BFSSearch, DFSSearch):
+            for goal in ('G', 'D', 'C'):
+                with self.subTest(engine=engine.__name__, goal=goal):
+                    context.reset(len(self.graph.node_ids))
+                    shared = engine(self.graph, 'A', goal, context=context).search()
+                    fresh = engine(self.graph, 'A', goal).search()
+                    self.assertEqual(shared['path'], fresh['path'])
+                    self.assertEqual(shared['cost'], fresh['cost'])
+                    self.assertEqual(shared['nodes_expanded'], fresh['nodes_expanded'])
+    
+    def test_supplied_context_needs_no_reset(self):
+        """Test that engines reset a fresh or used context themselves"""
+        for engine in (AStarSearch, BFSSearch, DFSSearch):
+            with self.subTest(engine=engine.__name__):
+                self.assertTrue(engine(self.graph, 'A', 'G', context=SearchContext(9)).search()['success'])
+                context = SearchContext()
+                for goal in ('G', 'D'):
+                    shared = engine(self.graph, 'A', goal, context=context).search()
+                    self.assertEqual(shared['path'], engine(self.graph, 'A', goal).search()['path'])
+    
+    def test_astar_equal_f_values(self):
+        """Test that ties on f(n) do not compare heap payloads"""
+        result = AStarSearch(self.graph, 'C', 'D').search()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['path'][-1], 'D')
+
+
+class TestGCMonitor(unittest.TestCase):
+    """Test GC pause measurement"""
+    
+    def test_counts_collections(self):
+        """Test that explicit collections are recorded"""
+        import gc
+        
+        with GCMonitor() as monitor:
+            gc.collect()
+        self.assertGreaterEqual(monitor.stats()['collections'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
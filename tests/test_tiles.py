@@ -0,0 +1,125 @@
+"""
+Unit tests for the tiled, level-of-detail graph endpoint
+"""
+
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+from generators import grid_graph
+from tiles import MAX_TILES, TileIndex, parse_bbox, parse_zoom, tile_index_for
+
+
+class TestTileIndex(unittest.TestCase):
+    """Test tile queries against the underlying graph"""
+    
+    def setUp(self):
+        """Build a graph with 10,000 nodes on a unit grid"""
+        self.graph = grid_graph(100, 100, obstacle_ratio=0.0)
+        self.index = TileIndex(self.graph)
+    
+    def collect(self, zoom):
+        """Merge every tile at `zoom`"""
+        nodes, edges = {}, {}
+        for column in range(2 ** zoom):
+            for row in range(2 ** zoom):
+                payload = self.index.tile(zoom, (column, row))
+                nodes.update(payload['nodes'])
+                edges.update({(e['from'], e['to']): e for e in payload['edges']})
+        return nodes, edges
+    
+    def test_full_detail_covers_graph(self):
+        """Test that full-detail tiles together hold every node and edge once"""
+        nodes, edges = self.collect(4)
+        self.assertFalse(self.index.level(4).simplified)
+        self.assertEqual(set(nodes), set(self.graph.nodes))
+        edge_count = sum(len(neighbors) for neighbors in self.graph.edges.values()) // 2
+        self.assertEqual(len(edges), edge_count)
+    
+    def test_low_zoom_is_simplified(self):
+        """Test that zoom 0 draws cluster representatives only"""
+        result = self.index.query(self.index.bounds, 0)
+        self.assertEqual(result['detail'], 'simplified')
+        self.assertLess(len(result['nodes']), len(self.graph.nodes))
+        self.assertEqual(sum(node['members'] for node in result['nodes'].values()),
+                         len(self.graph.nodes))
+        for edge in result['edges']:
+            self.assertIn(edge['from'], result['nodes'])
+            self.assertIn(edge['to'], result['nodes'])
+    
+    def test_bbox_limits_nodes(self):
+        """Test that a small viewport returns only nearby nodes"""
+        result = self.index.query((0, 0, 10, 10), 4)
+        self.assertEqual(result['tiles'], [[0, 0], [1, 0], [0, 1], [1, 1]])
+        self.assertLess(len(result['nodes']), 400)
+        # Every edge endpoint is present so edges leaving the view can be drawn
+        for edge in result['edges']:
+            self.assertIn(edge['to'], result['nodes'])
+    
+    def test_tile_cache(self):
+        """Test that repeated tiles come from the cache"""
+        first = self.index.tile(3, (1, 1))
+        self.assertIs(self.index.tile(3, (1, 1)), first)
+        small = TileIndex(self.graph, cache_size=1)
+        small.tile(3, (0, 0))
+        small.tile(3, (1, 0))
+        self.assertEqual(list(small.cache), [(3, (1, 0))])
+    
+    def test_rebuilt_on_change(self):
+        """Test that the index follows graph edits"""
+        index = tile_index_for(self.graph)
+        self.assertIs(tile_index_for(self.graph), index)
+        self.graph.add_edge(0, 9999, 1.0)
+        self.assertIsNot(tile_index_for(self.graph), index)
+    
+    def test_too_many_tiles(self):
+        """Test that huge viewports at deep zoom are refused"""
+        with self.assertRaises(ValueError):
+            self.index.tiles_for(self.index.bounds, 6)
+        self.assertLessEqual(len(self.index.tiles_for(self.index.bounds, 3)), MAX_TILES)
+    
+    def test_parsing(self):
+        """Test bbox and zoom validation"""
+        self.assertEqual(parse_bbox('0,1,2,3.5'), (0.0, 1.0, 2.0, 3.5))
+        for bad in ('1,2,3', '3,0,1,1', 'a,b,c,d', None, '0,0,inf,inf', 'nan,0,1,1'):
+            with self.assertRaises(ValueError):
+                parse_bbox(bad)
+        self.assertEqual(parse_zoom('5'), 5)
+        for bad in ('-1', '99', 'high'):
+            with self.assertRaises(ValueError):
+                parse_zoom(bad)
+
+
+class TestTilesEndpoint(unittest.TestCase):
+    """Test /api/graph/tiles"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def test_default_view(self):
+        """Test that the default query returns the demo graph"""
+        response = self.client.get('/api/graph/tiles?zoom=3')
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(data['nodes']), set(app.GRAPH.nodes))
+    
+    def test_revalidation(self):
+        """Test ETag revalidation"""
+        response = self.client.get('/api/graph/tiles?zoom=2&bbox=0,0,100,100')
+        etag = response.headers['ETag']
+        response = self.client.get('/api/graph/tiles?zoom=2&bbox=0,0,100,100',
+                                   headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+    
+    def test_invalid_query(self):
+        """Test that malformed viewports are rejected"""
+        response = self.client.get('/api/graph/tiles?bbox=1,2&zoom=1')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/graph/tiles?bbox=0,0,inf,inf&zoom=1')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
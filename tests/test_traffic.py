@@ -0,0 +1,154 @@
+"""
+Unit tests for traffic recording, replay and cache warming
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+import traffic
+from replay import replay, summarize
+from traffic import CacheWarmer, TrafficRecorder, read_log, warm_caches
+
+
+class TestTrafficRecorder(unittest.TestCase):
+    """Test the request recorder hooked into the app"""
+    
+    def setUp(self):
+        """Point the app at a recorder writing to a temporary file"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'traffic.ndjson')
+        self.recorder = TrafficRecorder(self.path)
+        self.previous = app.TRAFFIC
+        app.TRAFFIC = self.recorder
+        self.client = app.app.test_client()
+    
+    def tearDown(self):
+        """Restore the app's recorder"""
+        app.TRAFFIC = self.previous
+        self.recorder.handler.close()
+        self.directory.cleanup()
+    
+    def test_records_api_requests(self):
+        """Test that recorded routes are logged with their body and status"""
+        self.client.post('/api/search', json={'start': 'A', 'goal': 'G'})
+        self.client.post('/api/search', json={'start': 'missing', 'goal': 'G'})
+        self.client.get('/api/graph')
+        entries = read_log(self.path)
+        self.assertEqual([e['path'] for e in entries], ['/api/search', '/api/search'])
+        self.assertEqual(entries[0]['body'], {'start': 'A', 'goal': 'G'})
+        self.assertEqual([e['status'] for e in entries], [200, 400])
+        self.assertGreater(entries[0]['elapsed_ms'], 0)
+    
+    def test_replayed_requests_not_recorded(self):
+        """Test that replayed and warming traffic stays out of the log"""
+        self.client.post('/api/search', json={}, headers={'X-Replay': '1'})
+        warm_caches(app.app, [{'method': 'POST', 'path': '/api/search', 'body': {}}])
+        self.assertFalse(os.path.exists(self.path) and read_log(self.path))
+    
+    def test_disabled_without_env(self):
+        """Test that recording is opt-in"""
+        self.assertIsNone(TrafficRecorder.from_env({}))
+
+
+class TestReplay(unittest.TestCase):
+    """Test log reading, warming and the replay report"""
+    
+    def test_read_log_skips_bad_lines(self):
+        """Test that truncated or foreign lines are ignored"""
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as handle:
+            handle.write(json.dumps({'method': 'GET', 'path': '/api/graph'}) + '\n')
+            handle.write('{"truncated": \n')
+            handle.write(json.dumps([1, 2]) + '\n')
+            handle.write(json.dumps({'method': 'GET', 'path': '/api/health'}) + '\n')
+        try:
+            self.assertEqual(len(read_log(handle.name)), 2)
+            self.assertEqual(len(read_log(handle.name, limit=1)), 1)
+        finally:
+            os.unlink(handle.name)
+    
+    def test_warm_caches(self):
+        """Test that warming runs every entry in-process"""
+        entries = [{'method': 'POST', 'path': '/api/search', 'body': {'start': 'A', 'goal': 'G'}},
+                   {'method': 'GET', 'path': '/api/graph/tiles', 'query': 'zoom=1'}]
+        result = warm_caches(app.app, entries)
+        self.assertEqual(result['requests'], 2)
+        self.assertEqual(result['errors'], 0)
+    
+    def test_warm_in_background(self):
+        """Test that warming runs once, off the request path, while health reports it"""
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as handle:
+            handle.write(json.dumps({'method': 'POST', 'path': '/api/search',
+                                     'body': {'start': 'A', 'goal': 'G'}}) + '\n')
+        previous = app.WARMER
+        release = threading.Event()
+        original = traffic.warm_caches
+    
+        def held_warm_caches(flask_app, entries):
+            release.wait(5)
+            return original(flask_app, entries)
+    
+        try:
+            traffic.warm_caches = held_warm_caches
+            app.WARMER = CacheWarmer.from_env({'TRAFFIC_WARM': handle.name})
+            client = app.app.test_client()
+            self.assertTrue(app.WARMER.start(app.app))
+            self.assertFalse(app.WARMER.start(app.app))
+    
+            # Requests are served, not queued, while warming runs
+            response = client.get('/api/health')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['status'], 'warming')
+    
+            with self.assertLogs(app.app.logger, 'INFO'):
+                release.set()
+                self.assertEqual(app.WARMER.wait(5)['requests'], 1)
+            self.assertEqual(client.get('/api/health').get_json()['status'], 'healthy')
+    
+            # An unreadable log is logged and never blocks serving
+            app.WARMER = CacheWarmer(handle.name + '.missing')
+            with self.assertLogs(app.app.logger, 'WARNING'):
+                app.WARMER.start(app.app)
+                self.assertIsNone(app.WARMER.wait(5))
+            self.assertEqual(client.get('/api/health').status_code, 200)
+        finally:
+            traffic.warm_caches = original
+            app.WARMER = previous
+            os.unlink(handle.name)
+        self.assertIsNone(CacheWarmer.from_env({}))
+    
+    def test_replay_report(self):
+        """Test throughput, percentiles and per-route error rates"""
+        client = app.app.test_client()
+    
+        def send(entry):
+            return client.open(entry['path'], method=entry['method'], json=entry.get('body')).status_code
+    
+        entries = [{'method': 'POST', 'path': '/api/search', 'body': {'start': 'A', 'goal': 'G'},
+                    'status': 200}] * 20
+        entries += [{'method': 'GET', 'path': '/api/nowhere', 'status': 200}] * 5
+        report = replay(entries, send, rate=500, concurrency=4)
+        self.assertEqual(report['requests'], 25)
+        self.assertEqual(report['status_mismatches'], 5)
+        self.assertEqual(report['routes']['/api/search']['error_rate'], 0)
+        self.assertGreater(report['throughput_rps'], 0)
+        self.assertIsNotNone(report['schedule_lag_ms'])
+        latency = report['latency_ms']
+        self.assertLessEqual(latency['p50'], latency['p99'])
+    
+    def test_summarize_errors(self):
+        """Test that failures and server errors count as errors"""
+        summary = summarize([(200, 200, 1.0), (None, 200, 5.0), (503, 200, 2.0), (400, 400, 1.0)])
+        self.assertEqual(summary['errors'], 2)
+        self.assertEqual(summary['error_rate'], 0.5)
+        self.assertEqual(summary['status_mismatches'], 2)
+        self.assertEqual(summary['latency_ms']['max'], 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+"""
+Unit tests for the vectorized, direction-optimizing BFS engine
+"""
+
+import random
+import unittest
+import sys
+sys.path.append('../backend')
+
+import app
+from app import BFSSearch, Graph
+from generators import grid_graph, road_network
+from limits import SearchBudget
+from vector_bfs import HAS_NUMPY, VectorBFSSearch, csr_for
+
+
+def dense_graph(n, degree, seed):
+    """Random graph dense enough for bottom-up levels"""
+    rng = random.Random(seed)
+    graph = Graph()
+    for i in range(n):
+        graph.add_node(i, rng.random(), rng.random(), 0)
+    for _ in range(n * degree // 2):
+        a, b = rng.randrange(n), rng.randrange(n)
+        if a != b:
+            graph.add_edge(a, b, 1 + rng.random())
+    return graph
+
+
+@unittest.skipUnless(HAS_NUMPY, 'NumPy is not installed')
+class TestVectorBFS(unittest.TestCase):
+    """Test the vectorized engine against BFSSearch"""
+    
+    def assertMatchesScalar(self, graph, start, goal):
+        expected = BFSSearch(graph, start, goal).search()
+        result = VectorBFSSearch(graph, start, goal).search()
+        self.assertEqual(result['success'], expected['success'])
+        if expected['success']:
+            path = result['path']
+            self.assertEqual(len(path), len(expected['path']))
+            self.assertEqual(path[0], start)
+            self.assertEqual(path[-1], goal)
+            cost = sum(graph.edges[a][b] for a, b in zip(path, path[1:]))
+            self.assertAlmostEqual(result['cost'], cost, places=2)
+        return result
+    
+    def test_matches_scalar_bfs(self):
+        """Test hop counts against BFSSearch on sparse graphs"""
+        for graph in (road_network(1000, seed=4), grid_graph(30, 30, obstacle_ratio=0.3, seed=2)):
+            ids = graph.node_ids
+            for i in range(0, 200, 40):
+                with self.subTest(start=ids[i], goal=ids[-1 - i]):
+                    self.assertMatchesScalar(graph, ids[i], ids[-1 - i])
+    
+    def test_bottom_up_levels(self):
+        """Test that dense levels switch to bottom-up and stay correct"""
+        graph = dense_graph(3000, 30, seed=1)
+        for start, goal in ((0, 2999), (10, 20), (500, 1500)):
+            self.assertMatchesScalar(graph, start, goal)
+        # An unreachable goal forces a sweep through the densest levels
+        graph.add_node('island', 2, 2, 0)
+        result = self.assertMatchesScalar(graph, 0, 'island')
+        self.assertIn('bottom_up', [row['direction'] for row in result['trace']])
+        self.assertEqual(result['nodes_expanded'], 3000)
+    
+    def test_start_is_goal(self):
+        """Test the trivial query"""
+        graph = grid_graph(5, 5, obstacle_ratio=0.0)
+        result = VectorBFSSearch(graph, 7, 7).search()
+        self.assertEqual(result['path'], [7])
+        self.assertEqual(result['nodes_expanded'], 0)
+    
+    def test_unreachable(self):
+        """Test that a disconnected goal fails"""
+        graph = grid_graph(5, 5, obstacle_ratio=0.0)
+        graph.add_node('island', 50, 50, 0)
+        result = VectorBFSSearch(graph, 0, 'island').search()
+        self.assertFalse(result['success'])
+        self.assertEqual(result['nodes_expanded'], 25)
+    
+    def test_budget(self):
+        """Test that the expansion cap is checked between levels"""
+        graph = grid_graph(40, 40, obstacle_ratio=0.0)
+        result = VectorBFSSearch(graph, 0, 1599, budget=SearchBudget(max_expansions=30)).search()
+        self.assertFalse(result['success'])
+        self.assertEqual(result['limit']['reason'], 'max_expansions')
+    
+    def test_csr_rebuilt_on_change(self):
+        """Test that the CSR arrays follow graph edits"""
+        graph = grid_graph(5, 5, obstacle_ratio=0.0)
+        first = csr_for(graph)
+        self.assertIs(csr_for(graph), first)
+        graph.add_edge(0, 24, 1.0)
+        self.assertIsNot(csr_for(graph), first)
+        self.assertEqual(VectorBFSSearch(graph, 0, 24).search()['path'], [0, 24])
+    
+    def test_endpoint(self):
+        """Test the engine through /api/search"""
+        client = app.app.test_client()
+        response = client.post('/api/search', json={
+            'start': 'A', 'goal': 'G', 'algorithm': 'bfs_vector'
+        })
+        data = response.get_json()
+        expected = BFSSearch(app.GRAPH, 'A', 'G').search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['path']), len(expected['path']))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,105 @@
+"""
+Unit tests for graph payload caching and compact encodings
+"""
+
+import gzip
+import json
+import struct
+import unittest
+import sys
+from array import array
+sys.path.append('../backend')
+
+import app
+from app import load_graph
+from wire import GraphPayloadCache, columnar_trace, graph_binary, graph_columnar
+
+
+class TestGraphEndpoint(unittest.TestCase):
+    """Test caching headers on /api/graph"""
+    
+    def setUp(self):
+        """Set up test client"""
+        self.client = app.app.test_client()
+    
+    def test_json_shape_unchanged(self):
+        """Test that the default format keeps node and edge objects"""
+        data = self.client.get('/api/graph').get_json()
+        self.assertEqual(len(data['nodes']), 9)
+        self.assertEqual(len(data['edges']), 17)
+        self.assertEqual(data['nodes']['A'], {'x': 0, 'y': 0, 'h': 6.1})
+        self.assertEqual(data['edges'][0], {'from': 'A', 'to': 'B', 'cost': 2.2})
+    
+    def test_etag_revalidation(self):
+        """Test that a matching If-None-Match returns 304 with no body"""
+        etag = self.client.get('/api/graph').headers['ETag']
+        response = self.client.get('/api/graph', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+    
+    def test_gzip(self):
+        """Test gzip encoding when the client accepts it"""
+        plain = self.client.get('/api/graph')
+        response = self.client.get('/api/graph', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertEqual(response.headers['ETag'], plain.headers['ETag'])
+    
+    def test_unknown_format(self):
+        """Test that unknown formats are rejected"""
+        self.assertEqual(self.client.get('/api/graph?format=xml').status_code, 400)
+
+
+class TestEncodings(unittest.TestCase):
+    """Test columnar and binary encodings"""
+    
+    def setUp(self):
+        """Set up test graph"""
+        self.graph = load_graph()
+    
+    def test_columnar_edges_reference_nodes(self):
+        """Test that columnar edges index into the node arrays"""
+        data = graph_columnar(self.graph)
+        ids = data['nodes']['id']
+        edges = data['edges']
+        self.assertEqual(len(edges['from']), 17)
+        for f, t, cost in zip(edges['from'], edges['to'], edges['cost']):
+            self.assertEqual(self.graph.get_neighbors(ids[f])[ids[t]], cost)
+    
+    def test_binary_round_trip(self):
+        """Test that binary arrays decode to the columnar values"""
+        body = graph_binary(self.graph)
+        self.assertEqual(body[:4], b'SCG1')
+        header_length = struct.unpack('<I', body[4:8])[0]
+        header = json.loads(body[8:8 + header_length])
+        columnar = graph_columnar(self.graph)
+        codes = {'float64': 'd', 'uint32': 'I'}
+        expected = {
+            'x': columnar['nodes']['x'], 'y': columnar['nodes']['y'],
+            'h': columnar['nodes']['h'], 'edge_from': columnar['edges']['from'],
+            'edge_to': columnar['edges']['to'], 'edge_cost': columnar['edges']['cost']
+        }
+        for descriptor in header['arrays']:
+            with self.subTest(array=descriptor['name']):
+                self.assertEqual(descriptor['offset'] % 8, 0)
+                values = array(codes[descriptor['type']])
+                size = values.itemsize * descriptor['length']
+                values.frombytes(body[descriptor['offset']:descriptor['offset'] + size])
+                self.assertEqual(list(values), expected[descriptor['name']])
+    
+    def test_cache_tracks_graph_version(self):
+        """Test that payloads are re-encoded after the graph changes"""
+        cache = GraphPayloadCache()
+        first = cache.get(self.graph)
+        self.assertIs(cache.get(self.graph), first)
+        self.graph.add_edge('A', 'G', 9.9)
+        self.assertNotEqual(cache.get(self.graph).etag, first.etag)
+    
+    def test_columnar_trace(self):
+        """Test that trace rows become parallel arrays"""
+        trace = [{'step': 0, 'node': 'A'}, {'step': 1, 'node': 'B'}]
+        self.assertEqual(columnar_trace(trace), {'step': [0, 1], 'node': ['A', 'B']})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)